@@ -0,0 +1,202 @@
+import json
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.bidspace.bid_codec import BidCodec
+from agents.bidspace.bid_search import BidSearch
+from agents.bidspace.fingerprint import profile_fingerprint
+
+"""
+    Precomputed bid space artifacts, stored next to the profile file they belong to:
+
+        profileA.utilities.npy      Own utility of every bid (float64)
+        profileA.order.npy          Bid indices sorted by own utility (int64)
+        profileA.sorted.npy         Own utilities in sorted order (float64)
+        profileA.bidspace.json      Fingerprint of the profile and size of the bid space
+
+    Bids are indexed in the canonical layout of BidCodec, which is the same in every process. The arrays are opened as
+    read-only memory maps, so the sessions of a tournament share one copy through the page cache. The meta file is
+    written last and records the shape, type and CRC-32 of every array. Artifacts whose fingerprint does not match
+    the profile, or whose arrays do not match the meta file, such as after an interrupted write, are ignored and
+    rebuilt.
+
+    The CRC-32 reads every page of an array, so it is only checked when the artifacts are prepared before the
+    sessions run. Agents check the fingerprint, shapes and types, which does not touch the arrays. If the directory of
+    the profile cannot be written, the artifacts are computed in memory instead.
+"""
+
+ARTIFACT_LIMIT = 2 ** 20     # Larger bid spaces are searched, so no artifacts are stored for them
+
+
+class BidSpaceArtifacts(NamedTuple):
+    utilities: np.ndarray           # Own utility of each bid, canonical layout
+    order: np.ndarray               # Bid indices sorted by own utility
+    sorted_utilities: np.ndarray    # utilities[order]
+
+
+def profile_path_of(profile_uri: str) -> Optional[str]:
+    """
+        Local path of a profile URI
+    @param profile_uri: Profile URI such as "file:domains/domain00/profileA.json"
+    @return: Path of the profile file, None if the profile is not a local file
+    """
+    profile_uri = str(profile_uri)
+
+    if not profile_uri.startswith("file:"):
+        return None
+
+    return profile_uri[len("file:"):]
+
+
+def artifact_paths(profile_path: str) -> dict:
+    """
+        Paths of the artifacts of a profile file
+    @param profile_path: Path of the profile file
+    @return: Dictionary of artifact name to path
+    """
+    path = Path(profile_path)
+
+    return {
+        "utilities": path.with_name(f"{path.stem}.utilities.npy"),
+        "order": path.with_name(f"{path.stem}.order.npy"),
+        "sorted_utilities": path.with_name(f"{path.stem}.sorted.npy"),
+        "meta": path.with_name(f"{path.stem}.bidspace.json"),
+    }
+
+
+def load_artifacts(profile: LinearAdditive, profile_path: str, verify: bool = False) -> Optional[BidSpaceArtifacts]:
+    """
+        Memory map the artifacts of a profile
+    @param profile: Profile that is read from the profile file
+    @param profile_path: Path of the profile file
+    @param verify: Whether to check the CRC-32 of the arrays, which reads them completely
+    @return: Artifacts, None if they are missing or stale
+    """
+    paths = artifact_paths(profile_path)
+
+    try:
+        with open(paths["meta"], "r") as f:
+            meta = json.load(f)
+
+        if meta.get("fingerprint") != profile_fingerprint(profile):
+            return None
+
+        artifacts = BidSpaceArtifacts(np.load(paths["utilities"], mmap_mode="r"),
+                                      np.load(paths["order"], mmap_mode="r"),
+                                      np.load(paths["sorted_utilities"], mmap_mode="r"))
+    except (OSError, ValueError):
+        return None
+
+    arrays_meta = meta.get("arrays", {})
+    for name, array in zip(BidSpaceArtifacts._fields, artifacts):
+        described = arrays_meta.get(name, {})
+        if not verify:
+            described = {key: value for key, value in described.items() if key != "crc32"}
+
+        if described != _describe(array, verify) or array.shape != (meta.get("size"),):
+            return None
+
+    return artifacts
+
+
+def compute_artifacts(profile: LinearAdditive) -> BidSpaceArtifacts:
+    """
+        Compute the artifacts of a profile in memory
+    @param profile: Profile
+    @return: Computed artifacts
+    """
+    utilities = BidSearch(profile, BidCodec(profile.getDomain(), canonical=True)).tabulate()
+    order = np.argsort(utilities, kind="stable")
+
+    return BidSpaceArtifacts(utilities, order, utilities[order])
+
+
+def save_artifacts(profile: LinearAdditive, profile_path: str,
+                   artifacts: BidSpaceArtifacts = None) -> BidSpaceArtifacts:
+    """
+        Store the artifacts of a profile next to the profile file. Every file is replaced atomically, so concurrent
+        sessions never read a partially written file.
+    @param profile: Profile that is read from the profile file
+    @param profile_path: Path of the profile file
+    @param artifacts: Artifacts to store, computed if None
+    @return: Stored artifacts
+    """
+    if artifacts is None:
+        artifacts = compute_artifacts(profile)
+
+    paths = artifact_paths(profile_path)
+    for name, array in zip(BidSpaceArtifacts._fields, artifacts):
+        _replace(paths[name], lambda f, a=array: np.save(f, a))
+
+    meta = {
+        "fingerprint": profile_fingerprint(profile),
+        "size": len(artifacts.utilities),
+        "arrays": {name: _describe(array) for name, array in zip(BidSpaceArtifacts._fields, artifacts)},
+    }
+    _replace(paths["meta"], lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+    return artifacts
+
+
+def prepare_artifacts(profile: LinearAdditive, profile_path: str) -> Optional[BidSpaceArtifacts]:
+    """
+        Load and verify the artifacts of a profile, computing and storing them if they are missing or stale
+    @param profile: Profile that is read from the profile file
+    @param profile_path: Path of the profile file
+    @return: Artifacts, in memory if they cannot be stored; None if the bid space is larger than ARTIFACT_LIMIT
+    """
+    if BidCodec(profile.getDomain(), canonical=True).size > ARTIFACT_LIMIT:
+        return None
+
+    artifacts = load_artifacts(profile, profile_path, verify=True)
+    if artifacts is not None:
+        return artifacts
+
+    artifacts = compute_artifacts(profile)
+    try:
+        save_artifacts(profile, profile_path, artifacts)
+    except OSError:
+        return artifacts
+
+    # memory mapped, so the table is shared with the sessions through the page cache
+    stored = load_artifacts(profile, profile_path)
+
+    return stored if stored is not None else artifacts
+
+
+def _describe(array: np.ndarray, checksum: bool = True) -> dict:
+    """
+        Shape, type and checksum of an array, as stored in the meta file
+    @param array: Array
+    @param checksum: Whether to include the CRC-32, which reads the whole array
+    @return: Description of the array
+    """
+    description = {"shape": list(array.shape), "dtype": array.dtype.str}
+
+    if checksum:
+        description["crc32"] = zlib.crc32(np.ascontiguousarray(array))
+
+    return description
+
+
+def _replace(path: Path, write) -> None:
+    """
+        Write a file through a temporary file in the same directory and move it into place
+    @param path: Destination path
+    @param write: Function that writes the content to a binary file object
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,125 @@
+from typing import Tuple
+
+import numpy as np
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+
+
+class BidCodec:
+    """
+        Compact integer representation of bids.
+
+        A bid is encoded as a mixed-radix index or as a tuple of per-issue value indices (digits). Digits follow the
+        sorted issue names and the value order of the domain, so they are stable across processes.
+
+        By default the index of a bid is the same index the bid has in AllBidsList. AllBidsList follows the iteration
+        order of the domain's issue set, which can differ between processes, so indices that are shared between
+        processes or persisted should use the canonical layout instead: the last issue in sorted order varies fastest.
+    """
+    issues: list                # Issue names, sorted. Digit order.
+    values: list                # Values of each issue in domain order
+    value_indices: list         # Value -> digit dictionary of each issue
+    radices: np.ndarray         # Number of values of each issue (int64)
+    strides: np.ndarray         # Place value of each issue in the bid index (int64)
+    size: int                   # Number of bids
+    canonical: bool             # Whether the canonical layout is used instead of the AllBidsList one
+
+    def __init__(self, domain: Domain, canonical: bool = False):
+        self.issues = sorted(domain.getIssues())
+        self.values = [list(domain.getValues(issue)) for issue in self.issues]
+        self.value_indices = [{value: i for i, value in enumerate(values)} for values in self.values]
+        self.radices = np.array([len(values) for values in self.values], dtype=np.int64)
+        self.size = int(np.prod(self.radices))
+        self.canonical = canonical
+
+        if canonical:
+            self.strides = np.ones(len(self.issues), dtype=np.int64)
+            self.strides[:-1] = np.cumprod(self.radices[::-1])[::-1][1:]
+            return
+
+        # AllBidsList enumerates the outer product of the value sets, so every issue has a fixed place value. The
+        # place values are found by probing: starting from the first bid, the bid at the next place value differs
+        # only in the issue that varies next. Issues with a single value never change and keep a stride of 1.
+        all_bids = AllBidsList(domain)
+        self.strides = np.ones(len(self.issues), dtype=np.int64)
+        first_bid = all_bids.get(0)
+        remaining = [k for k, radix in enumerate(self.radices) if radix > 1]
+        stride = 1
+
+        while len(remaining) > 0:
+            probe = all_bids.get(stride)
+            k = next(k for k in remaining if probe.getValue(self.issues[k]) != first_bid.getValue(self.issues[k]))
+
+            self.strides[k] = stride
+            stride *= int(self.radices[k])
+            remaining.remove(k)
+
+    def encode(self, bid: Bid) -> int:
+        """
+            Index of a bid
+        @param bid: Complete bid
+        @return: Index of the bid
+        """
+        return self.from_digits(self.to_digits_of_bid(bid))
+
+    def decode(self, index: int) -> Bid:
+        """
+            Bid of an index
+        @param index: Index of the bid
+        @return: Bid
+        """
+        return self.to_bid(self.to_digits(index))
+
+    def to_digits(self, index: int) -> Tuple[int, ...]:
+        """
+            Per-issue value indices of an index
+        @param index: Index of the bid
+        @return: Value index of each issue, in the order of issues
+        """
+        index = int(index)
+
+        return tuple((index // int(stride)) % int(radix) for stride, radix in zip(self.strides, self.radices))
+
+    def from_digits(self, digits: Tuple[int, ...]) -> int:
+        """
+            Index of per-issue value indices
+        @param digits: Value index of each issue, in the order of issues
+        @return: Index of the bid
+        """
+        return sum(int(digit) * int(stride) for digit, stride in zip(digits, self.strides))
+
+    def to_digits_of_bid(self, bid: Bid) -> Tuple[int, ...]:
+        """
+            Per-issue value indices of a bid
+        @param bid: Complete bid
+        @return: Value index of each issue, in the order of issues
+        """
+        return tuple(value_indices[bid.getValue(issue)]
+                     for issue, value_indices in zip(self.issues, self.value_indices))
+
+    def to_bid(self, digits: Tuple[int, ...]) -> Bid:
+        """
+            Bid of per-issue value indices
+        @param digits: Value index of each issue, in the order of issues
+        @return: Bid
+        """
+        return Bid({issue: values[int(digit)] for issue, values, digit in zip(self.issues, self.values, digits)})
+
+    def digits_of(self, indices: np.ndarray) -> np.ndarray:
+        """
+            Vectorized to_digits
+        @param indices: Bid indices
+        @return: Array of shape (len(indices), len(issues)) with the value index of each issue
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+
+        return (indices[:, np.newaxis] // self.strides) % self.radices
+
+    def indices_of(self, digits: np.ndarray) -> np.ndarray:
+        """
+            Vectorized from_digits
+        @param digits: Array of shape (n, len(issues)) with the value index of each issue
+        @return: Bid indices
+        """
+        return np.asarray(digits, dtype=np.int64) @ self.strides
@@ -0,0 +1,273 @@
+import heapq
+from typing import Optional
+
+import numpy as np
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.bidspace.bid_codec import BidCodec
+from agents.bidspace.stats import get_value_utilities
+
+EPSILON = 1e-12     # Slack of the bounds against rounding of partial sums
+
+
+class BidSearch:
+    """
+        Bid search for LinearAdditive profiles that never enumerates AllBidsList.
+
+        The utility of a bid is the sum of the weighted utilities of its values, so a depth-first search over issues
+        can bound every completion of a partial bid with suffix sums of the per-issue maxima and minima. Subtrees
+        that cannot reach the requested utility, or cannot beat the bids found so far, are pruned. Run time grows
+        with the number of bids returned rather than with the size of the domain.
+
+        Pruning cannot help when the bids are spread finely, so every query also has a budget of search nodes and
+        returns the best it has found when the budget runs out. A node is one value tried at one depth.
+
+        Bids are given as indices in the layout of the codec of the search, which is the canonical layout everywhere
+        in the agents; use the codec to turn them into bids.
+    """
+    MAX_NODES: int = 50_000     # Default node budget of a query
+    NODES_PER_BID: int = 8      # Node budget of a query with a limit, in paths from the root per requested bid
+
+    codec: BidCodec
+    utilities: list             # Own weighted utility of each value, one float64 array per issue in codec order
+    order: list                 # Issues in search order, widest utility range first
+    suffix_max: list            # suffix_max[d]: maximum own utility of the issues order[d:]
+    suffix_min: list            # suffix_min[d]: minimum own utility of the issues order[d:]
+    path_nodes: int             # Nodes of a path from the root to a bid that tries every value of every issue
+
+    def __init__(self, profile: LinearAdditive, codec: BidCodec):
+        self.codec = codec
+
+        self.utilities = get_value_utilities(profile, self.codec)
+
+        # Deciding the widest issues first makes the bounds of the remaining issues tight early.
+        self.order = sorted(range(len(self.utilities)), key=lambda k: -np.ptp(self.utilities[k]))
+        self.suffix_max = self._suffix_sums([np.max(u) for u in self.utilities])
+        self.suffix_min = self._suffix_sums([np.min(u) for u in self.utilities])
+        self.path_nodes = max(1, sum(len(u) for u in self.utilities))
+
+    def _suffix_sums(self, per_issue: list) -> list:
+        """
+            Suffix sums of per-issue values in search order
+        @param per_issue: One value for each issue in codec order
+        @return: List of len(order) + 1 floats, the last one is 0
+        """
+        sums = [0.0] * (len(self.order) + 1)
+
+        for depth in reversed(range(len(self.order))):
+            sums[depth] = sums[depth + 1] + float(per_issue[self.order[depth]])
+
+        return sums
+
+    def _budget(self, max_nodes: Optional[int], limit: Optional[int] = None) -> int:
+        """
+            Node budget of a query, never less than a path to the first bid
+        @param max_nodes: Node budget requested by the caller, MAX_NODES if None
+        @param limit: Number of bids the query returns at most, None if unbounded
+        @return: Number of nodes
+        """
+        budget = self.MAX_NODES if max_nodes is None else max_nodes
+
+        if limit is not None:
+            budget = min(budget, limit * self.NODES_PER_BID * self.path_nodes)
+
+        return max(budget, self.path_nodes)
+
+    def get_min_max(self) -> (float, float):
+        """
+            Minimum and maximum utility of the bid space
+        @return: Minimum and maximum utility as float
+        """
+        return self.suffix_min[0], self.suffix_max[0]
+
+    def get_utilities(self, indices: np.ndarray) -> np.ndarray:
+        """
+            Own utilities of the given bids
+        @param indices: Indices of the bids in the layout of the codec
+        @return: Utility of each bid as float64 array
+        """
+        digits = self.codec.digits_of(indices)
+        total = np.zeros(len(digits), dtype=np.float64)
+
+        for k, value_utilities in enumerate(self.utilities):
+            total += value_utilities[digits[:, k]]
+
+        return total
+
+    def tabulate(self) -> np.ndarray:
+        """
+            Own utility of every bid in the order of the codec. Each issue contributes its values repeated by its place
+            value and tiled over the more significant issues, so no bid is enumerated.
+        @return: Utility table as float64 array
+        """
+        table = np.zeros(self.codec.size, dtype=np.float64)
+
+        for value_utilities, stride, radix in zip(self.utilities, self.codec.strides, self.codec.radices):
+            if radix > 1:
+                block = np.repeat(value_utilities, int(stride))
+                table += np.tile(block, self.codec.size // len(block))
+            else:
+                table += value_utilities[0]
+
+        return table
+
+    def search_range(self, lower: float, upper: float, limit: int = None, max_nodes: int = None) -> np.ndarray:
+        """
+            Bids whose utility is in [lower, upper]. The node budget is proportional to the limit, so a limited query
+            is cheap even when the range holds few bids.
+        @param lower: Minimum utility
+        @param upper: Maximum utility
+        @param limit: Maximum number of bids to return, all bids if None
+        @param max_nodes: Node budget, MAX_NODES if None
+        @return: Indices of the bids found within the budget
+        """
+        utilities = [self.utilities[k].tolist() for k in self.order]
+        ascending = [np.argsort(self.utilities[k], kind="stable").tolist() for k in self.order]
+        strides = [int(self.codec.strides[k]) for k in self.order]
+        depth_count = len(self.order)
+        results = []
+        budget = [self._budget(max_nodes, limit)]
+
+        def visit(depth: int, total: float, index: int) -> bool:
+            if depth == depth_count:
+                if lower <= total <= upper:
+                    results.append(index)
+                return limit is not None and len(results) >= limit
+
+            for digit in ascending[depth]:
+                budget[0] -= 1
+                if budget[0] < 0:
+                    return True
+
+                partial = total + utilities[depth][digit]
+
+                if partial + self.suffix_max[depth + 1] < lower - EPSILON:
+                    continue
+                if partial + self.suffix_min[depth + 1] > upper + EPSILON:
+                    break
+                if visit(depth + 1, partial, index + digit * strides[depth]):
+                    return True
+
+            return False
+
+        visit(0, 0.0, 0)
+
+        return np.array(results, dtype=np.int64)
+
+    def search_closest(self, utility: float, tolerance: float = 1e-9, max_nodes: int = None) -> int:
+        """
+            Bid whose utility is the closest to the desired utility. Finding the exact closest bid of a huge domain
+            is a subset-sum problem, so the search stops at the first bid within the tolerance, or at the closest bid
+            found when the node budget runs out.
+        @param utility: Desired utility
+        @param tolerance: Distance that is close enough
+        @param max_nodes: Node budget, MAX_NODES if None
+        @return: Index of the bid
+        """
+        utilities = [self.utilities[k].tolist() for k in self.order]
+        strides = [int(self.codec.strides[k]) for k in self.order]
+        depth_count = len(self.order)
+        best = [float("inf"), 0]
+        budget = [self._budget(max_nodes)]
+
+        def visit(depth: int, total: float, index: int) -> bool:
+            if depth == depth_count:
+                if abs(total - utility) < best[0]:
+                    best[0], best[1] = abs(total - utility), index
+                return best[0] <= tolerance
+
+            budget[0] -= len(utilities[depth])
+            if budget[0] < 0 and best[0] < float("inf"):
+                return True
+
+            # Lower bound of the distance of every completion, for each value of this issue
+            children = []
+            for digit, value_utility in enumerate(utilities[depth]):
+                partial = total + value_utility
+                distance = max(0.0, partial + self.suffix_min[depth + 1] - utility,
+                               utility - partial - self.suffix_max[depth + 1])
+                # Subtrees whose utility range is centered on the target are the most promising
+                center = abs(partial + (self.suffix_min[depth + 1] + self.suffix_max[depth + 1]) / 2. - utility)
+                children.append((distance, center, digit, partial))
+
+            for distance, _, digit, partial in sorted(children):
+                if distance >= best[0]:
+                    break
+                if visit(depth + 1, partial, index + digit * strides[depth]):
+                    return True
+
+            return False
+
+        visit(0, 0.0, 0)
+
+        return best[1]
+
+    def search_top_k(self, min_utility: float, opponent_utilities: list, k: int, excluded: set = None,
+                     max_nodes: int = None) -> np.ndarray:
+        """
+            Bids with own utility of at least min_utility that maximize the estimated opponent utility
+        @param min_utility: Minimum own utility
+        @param opponent_utilities: Estimated opponent utility of each value, one array per issue in codec order
+        @param k: Number of bids to return
+        @param excluded: Indices of the bids that must not be returned
+        @param max_nodes: Node budget, MAX_NODES if None
+        @return: Indices of at most k bids, the best first, of the bids found within the budget
+        """
+        excluded = excluded if excluded is not None else set()
+
+        utilities = [self.utilities[i].tolist() for i in self.order]
+        opponent = [np.asarray(opponent_utilities[i], dtype=np.float64).tolist() for i in self.order]
+        descending = [np.argsort(-np.asarray(opponent_utilities[i]), kind="stable").tolist() for i in self.order]
+        strides = [int(self.codec.strides[i]) for i in self.order]
+        opponent_suffix_max = self._suffix_sums([np.max(opponent_utilities[i]) for i in range(len(self.utilities))])
+        depth_count = len(self.order)
+        heap = []   # Min-heap of (opponent utility, index) of the best bids found so far
+        budget = [self._budget(max_nodes)]
+
+        def visit(depth: int, own: float, opp: float, index: int) -> bool:
+            if depth == depth_count:
+                if own >= min_utility and index not in excluded:
+                    if len(heap) < k:
+                        heapq.heappush(heap, (opp, -index))
+                    elif opp > heap[0][0]:
+                        heapq.heapreplace(heap, (opp, -index))
+                return False
+
+            for digit in descending[depth]:
+                budget[0] -= 1
+                if budget[0] < 0 and len(heap) > 0:
+                    return True
+
+                partial_opp = opp + opponent[depth][digit]
+
+                # Values are tried from the most to the least preferred by the opponent, so no later value can do better.
+                if len(heap) == k and partial_opp + opponent_suffix_max[depth + 1] <= heap[0][0]:
+                    break
+
+                partial_own = own + utilities[depth][digit]
+                if partial_own + self.suffix_max[depth + 1] < min_utility - EPSILON:
+                    continue
+
+                if visit(depth + 1, partial_own, partial_opp, index + digit * strides[depth]):
+                    return True
+
+            return False
+
+        if k > 0:
+            visit(0, 0.0, 0.0, 0)
+
+        return np.array([-index for _, index in sorted(heap, reverse=True)], dtype=np.int64)
+
+    def search_best(self, min_utility: float, opponent_utilities: list, excluded: set = None,
+                    max_nodes: int = None) -> Optional[int]:
+        """
+            Bid with own utility of at least min_utility that maximizes the estimated opponent utility
+        @param min_utility: Minimum own utility
+        @param opponent_utilities: Estimated opponent utility of each value, one array per issue in codec order
+        @param excluded: Indices of the bids that must not be returned
+        @param max_nodes: Node budget, MAX_NODES if None
+        @return: Index of the bid, None if no bid reaches min_utility
+        """
+        best = self.search_top_k(min_utility, opponent_utilities, 1, excluded, max_nodes)
+
+        return int(best[0]) if len(best) > 0 else None
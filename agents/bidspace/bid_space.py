@@ -0,0 +1,117 @@
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.bidspace.artifacts import ARTIFACT_LIMIT, BidSpaceArtifacts, load_artifacts, profile_path_of
+from agents.bidspace.bid_codec import BidCodec
+from agents.bidspace.bid_search import BidSearch
+from agents.bidspace.stats import UtilityStats, get_utility_stats
+
+
+SEARCH_LIMIT = 1000     # Default number of bids of a window query on a searched bid space
+
+
+class BidSpace:
+    """
+        Bid space of the session, indexed in the canonical layout of BidCodec. It is built once per session when
+        Settings arrives. Domains up to TABLE_LIMIT bids get a utility table answered with vectorized masks; larger
+        ones are answered by branch-and-bound search, so they are never enumerated. The table is memory mapped from
+        the precomputed artifacts of the profile file when they are up to date.
+    """
+    TABLE_LIMIT: int = ARTIFACT_LIMIT       # Larger bid spaces are searched instead of tabulated
+
+    profile: LinearAdditive
+    codec: BidCodec                         # Bid <-> index encoding
+    search: BidSearch                       # Search over the bid space
+    stats: UtilityStats                     # Minimum, maximum, mean and standard deviation of own utility
+    utilities: np.ndarray                   # Own utility of each bid (float64), None for searched bid spaces
+
+    def __init__(self, profile: LinearAdditive, profile_uri: str = None):
+        self.profile = profile
+        self.codec = BidCodec(profile.getDomain(), canonical=True)
+        self.search = BidSearch(profile, self.codec)
+        self.stats = get_utility_stats(self.search.utilities)
+        self.utilities = None
+
+        if self.codec.size <= self.TABLE_LIMIT:
+            profile_path = profile_path_of(profile_uri) if profile_uri is not None else None
+            artifacts = load_artifacts(profile, profile_path) if profile_path is not None else None
+
+            self.set_table(artifacts)
+
+    def set_table(self, artifacts: BidSpaceArtifacts = None):
+        """
+            Set up the utility table
+        @param artifacts: Precomputed artifacts of the profile, None to tabulate the bid space
+        """
+        self.utilities = artifacts.utilities if artifacts is not None else self.search.tabulate()
+
+    def size(self) -> int:
+        """
+            Number of bids in the bid space
+        @return: Domain size
+        """
+        return self.codec.size
+
+    def get_utility(self, index: int) -> float:
+        """
+            Own utility of the bid at the given index
+        @param index: Index of the bid in canonical order
+        @return: Utility
+        """
+        return float(self.get_utilities(np.array([index]))[0])
+
+    def get_utilities(self, indices: np.ndarray) -> np.ndarray:
+        """
+            Own utilities of the bids at the given indices
+        @param indices: Indices of the bids in canonical order
+        @return: Utilities as float64 array
+        """
+        if self.utilities is None:
+            return self.search.get_utilities(indices)
+
+        return self.utilities[indices]
+
+    def get(self, index: int) -> Bid:
+        """
+            Bid at the given index
+        @param index: Index of the bid in canonical order
+        @return: Bid
+        """
+        return self.codec.decode(index)
+
+    def index_of(self, bid: Bid) -> int:
+        """
+            Index of the given bid
+        @param bid: Bid
+        @return: Index of the bid in canonical order
+        """
+        return self.codec.encode(bid)
+
+    def get_indices_at(self, utility: float, lower_bound: float, upper_bound: float,
+                       limit: int = SEARCH_LIMIT) -> np.ndarray:
+        """
+            Indices of the bids between [utility - lower_bound, utility + upper_bound]
+        @param utility: Desired Utility
+        @param lower_bound: Lower bound of the Range
+        @param upper_bound: Upper bound of the Range
+        @param limit: Maximum number of bids a searched bid space returns, which also bounds the cost of the search
+        @return: Bid indices in that range
+        """
+        if self.utilities is None:
+            return self.search.search_range(utility - lower_bound, utility + upper_bound, limit)
+
+        mask = (self.utilities >= utility - lower_bound) & (self.utilities <= utility + upper_bound)
+
+        return np.flatnonzero(mask)
+
+    def get_closest_index(self, utility: float) -> int:
+        """
+            Index of the bid whose utility is the closest to the desired utility
+        @param utility: Desired Utility
+        @return: Bid index
+        """
+        if self.utilities is None:
+            return self.search.search_closest(utility)
+
+        return int(np.argmin(np.abs(self.utilities - utility)))
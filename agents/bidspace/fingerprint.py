@@ -0,0 +1,48 @@
+import hashlib
+
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+"""
+    Content hashes of domains and profiles. Equal content gives equal fingerprints in every process, so they can key
+    caches and files that outlive a session.
+"""
+
+
+def domain_fingerprint(domain: Domain) -> str:
+    """
+        Fingerprint of a domain: its name, issues and values in domain order
+    @param domain: Domain
+    @return: Hex digest
+    """
+    digest = hashlib.sha256(domain.getName().encode("utf-8"))
+
+    for issue in sorted(domain.getIssues()):
+        digest.update(f"\0{issue}:".encode("utf-8"))
+        digest.update("\0".join(str(value) for value in domain.getValues(issue)).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def profile_fingerprint(profile: LinearAdditive) -> str:
+    """
+        Fingerprint of a LinearAdditive profile: its domain, issue weights, value utilities and reservation bid
+    @param profile: Profile
+    @return: Hex digest
+    """
+    domain = profile.getDomain()
+    utilities = profile.getUtilities()
+    digest = hashlib.sha256(domain_fingerprint(domain).encode("utf-8"))
+
+    for issue in sorted(domain.getIssues()):
+        digest.update(f"\0{issue}:{profile.getWeight(issue)}".encode("utf-8"))
+        for value in domain.getValues(issue):
+            digest.update(f"\0{value}={utilities[issue].getUtility(value)}".encode("utf-8"))
+
+    reservation_bid = profile.getReservationBid()
+    if reservation_bid is not None:
+        digest.update(b"\0reservation")
+        for issue in sorted(reservation_bid.getIssues()):
+            digest.update(f"\0{issue}={reservation_bid.getValue(issue)}".encode("utf-8"))
+
+    return digest.hexdigest()
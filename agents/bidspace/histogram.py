@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+
+"""
+    Histogram of the utilities of all bids of a LinearAdditive profile, without enumerating the bid space.
+
+    The weighted value utilities of each issue are rounded to a common bin width and counted per bin. The utility of a
+    bid is the sum of one value of each issue, so the histogram of the bid space is the convolution of the per-issue
+    histograms. Counts are exact for the rounded utilities; a bid is off by at most half a bin width per issue.
+"""
+
+
+class UtilityHistogram:
+    """
+        Number of bids per utility bin. Bin i is centered at lower + i * bin_width.
+    """
+    lower: float                # Minimum utility of a bid, the center of the first bin
+    bin_width: float            # Width of a bin
+    counts: np.ndarray          # Number of bids in each bin (float64)
+    cumulative: np.ndarray      # cumulative[i]: number of bids in the bins before bin i
+
+    def __init__(self, value_utilities: list, bins: int = 1024):
+        """
+            Histogram of a bid space
+        @param value_utilities: Weighted utility of every value, one array per issue
+        @param bins: Number of bins over the utility range of the bid space
+        """
+        minima = [float(np.min(utilities)) for utilities in value_utilities]
+        span = sum(float(np.max(utilities)) for utilities in value_utilities) - sum(minima)
+
+        self.lower = sum(minima)
+        self.bin_width = span / bins if span > 0 else 1.
+        self.counts = np.ones(1, dtype=np.float64)
+
+        for utilities, minimum in zip(value_utilities, minima):
+            offsets = np.rint((np.asarray(utilities) - minimum) / self.bin_width).astype(np.int64)
+            self.counts = np.convolve(self.counts, np.bincount(offsets).astype(np.float64))
+
+        self.cumulative = np.concatenate([[0.], np.cumsum(self.counts)])
+
+    def count_below(self, utility: float) -> float:
+        """
+            Number of bids with a utility up to the given one, spreading the bids of a bin evenly over its width
+        @param utility: Utility
+        @return: Number of bids
+        """
+        position = (utility - self.lower) / self.bin_width + .5
+
+        if position <= 0:
+            return 0.
+        if position >= len(self.counts):
+            return float(self.cumulative[-1])
+
+        i = int(position)
+
+        return float(self.cumulative[i] + (position - i) * self.counts[i])
+
+    def count_between(self, lower: float, upper: float) -> float:
+        """
+            Number of bids between [lower, upper]
+        @param lower: Minimum utility
+        @param upper: Maximum utility
+        @return: Estimated number of bids
+        """
+        return max(0., self.count_below(upper) - self.count_below(lower))
+
+    def get_window(self, utility: float, k: int, max_width: float = math.inf, tolerance: float = 1e-6) -> float:
+        """
+            Smallest half width of a window around the utility that holds about k bids
+        @param utility: Center of the window
+        @param k: Desired number of bids
+        @param max_width: Largest half width that is returned
+        @param tolerance: Precision of the half width
+        @return: Half width of the window
+        """
+        upper_width = min(max_width, (len(self.counts) + 1) * self.bin_width)
+
+        if self.count_between(utility - upper_width, utility + upper_width) <= k:
+            return upper_width
+
+        lower_width = 0.
+        while upper_width - lower_width > tolerance:
+            width = (lower_width + upper_width) / 2.
+
+            if self.count_between(utility - width, utility + width) >= k:
+                upper_width = width
+            else:
+                lower_width = width
+
+        return upper_width
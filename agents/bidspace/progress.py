@@ -0,0 +1,29 @@
+from geniusweb.progress.Progress import Progress
+from geniusweb.progress.ProgressRounds import ProgressRounds
+
+
+class SessionProgress:
+    """
+        Progress of the session, shared by the components of the agent. ProgressTime follows the wall clock. In
+        round-based sessions the agent counts the rounds itself by calling advance on each turn, so the time of the
+        session only advances with the actions of the parties and does not depend on the speed of the machine.
+    """
+    progress: Progress          # Current progress of geniusweb
+
+    def __init__(self, progress: Progress):
+        self.progress = progress
+
+    def advance(self):
+        """
+            Count a round of a round-based session. It has no effect on time-based sessions.
+        """
+        if isinstance(self.progress, ProgressRounds):
+            self.progress = self.progress.advance()
+
+    def get(self, current_time: int) -> float:
+        """
+            Progress of the session
+        @param current_time: Current time in ms since the epoch
+        @return: Progress in range [0, 1]
+        """
+        return self.progress.get(current_time)
@@ -0,0 +1,65 @@
+from typing import NamedTuple
+
+import numpy as np
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.bidspace.bid_codec import BidCodec
+
+"""
+    Statistics of the utilities of all bids of a LinearAdditive profile, in closed form.
+
+    The utility of a bid is the sum of the weighted utilities of its values, and every value of an issue appears in
+    the same number of bids. Over the whole bid space the issues are therefore independent and uniform over their
+    values, so the minimum and maximum are the sums of the per-issue extremes, and the mean and variance are the sums
+    of the per-issue means and variances. Nothing is enumerated; the cost is linear in the number of values.
+"""
+
+
+class UtilityStats(NamedTuple):
+    min: float      # Minimum utility of a bid
+    max: float      # Maximum utility of a bid
+    mean: float     # Mean utility of all bids
+    stdev: float    # Population standard deviation of the utilities of all bids
+
+
+def get_value_utilities(profile: LinearAdditive, codec: BidCodec) -> list:
+    """
+        Weighted utility of every value, as one lookup array per issue
+    @param profile: Profile
+    @param codec: Codec whose issue and value order the arrays follow
+    @return: List of float64 arrays
+    """
+    value_utilities = profile.getUtilities()
+
+    return [np.array([float(profile.getWeight(issue) * value_utilities[issue].getUtility(value)) for value in values],
+                     dtype=np.float64)
+            for issue, values in zip(codec.issues, codec.values)]
+
+
+def get_utility_stats(value_utilities: list) -> UtilityStats:
+    """
+        Minimum, maximum, mean and standard deviation of the utilities of all bids
+    @param value_utilities: Weighted utility of every value, one array per issue
+    @return: Statistics of the bid space
+    """
+    min_utility = 0.
+    max_utility = 0.
+    mean = 0.
+    variance = 0.
+
+    for utilities in value_utilities:
+        min_utility += float(np.min(utilities))
+        max_utility += float(np.max(utilities))
+        mean += float(np.mean(utilities))
+        variance += float(np.var(utilities))
+
+    return UtilityStats(min_utility, max_utility, mean, float(np.sqrt(variance)))
+
+
+def get_profile_stats(profile: LinearAdditive) -> UtilityStats:
+    """
+        Statistics of the utilities of all bids of a profile
+    @param profile: Profile
+    @return: Statistics of the bid space
+    """
+    return get_utility_stats(get_value_utilities(profile, BidCodec(profile.getDomain(), canonical=True)))
@@ -9,7 +9,6 @@ from geniusweb.actions.Action import Action
 from geniusweb.actions.LearningDone import LearningDone
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -43,11 +42,13 @@ class Group4(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
-        self.progress: ProgressTime = None
+        self.progress: SessionProgress = None
         self.me: PartyId = None
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.profile_uri: str = None
+        self.bid_space: BidSpace = None
 
         self.last_received_bid: Bid = None
         self.last_generated_bid: Bid = None
@@ -73,7 +74,7 @@ class Group4(DefaultParty):
             self.me = self.settings.getID()
 
             # progress towards the deadline has to be tracked manually through the use of the Progress object
-            self.progress = self.settings.getProgress()
+            self.progress = SessionProgress(self.settings.getProgress())
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
@@ -85,6 +86,7 @@ class Group4(DefaultParty):
                 return
 
             # the profile contains the preferences of the agent over the domain
+            self.profile_uri = str(data.getProfile().getURI())
             profile_connection = ProfileConnectionFactory.create(
                 data.getProfile().getURI(), self.getReporter()
             )
@@ -117,6 +119,8 @@ class Group4(DefaultParty):
         elif isinstance(data, YourTurn):
             # execute a turn
             self.take_action()
+            # a round has passed in round-based sessions
+            self.progress.advance()
 
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(data, Finished):
@@ -135,11 +139,14 @@ class Group4(DefaultParty):
         self.last_received_bid = None
         self.last_generated_bid = None
 
+        # Utility table of the whole bid space, built once per session
+        self.bid_space = BidSpace(self.profile, self.profile_uri)
+
         # Initiate Components
         self.opponent_model = OpponentModel(self.domain, self.profile, self.progress)
-        self.bidding_strategy = BiddingStrategy(self.profile, self.progress)
+        self.bidding_strategy = BiddingStrategy(self.profile, self.progress, bid_space=self.bid_space)
         self.acceptance_strategy = AcceptanceStrategy(self.profile, self.progress)
-        self.learning_model = LearningModel(self.profile, self.progress)
+        self.learning_model = LearningModel(self.profile, self.progress, opponent_model=self.opponent_model)
 
         # Load data if other agent is known
         if self.other is not None:
@@ -189,7 +196,7 @@ class Group4(DefaultParty):
 
             # create bidding strategy if it was not yet initialised
             if self.bidding_strategy is None:
-                self.bidding_strategy = BiddingStrategy(self.profile, self.progress)
+                self.bidding_strategy = BiddingStrategy(self.profile, self.progress, bid_space=self.bid_space)
 
             # Received bid
             bid = cast(Offer, action).getBid()
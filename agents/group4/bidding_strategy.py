@@ -6,15 +6,17 @@ class BiddingStrategy:
         Bidding Strategy
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
-    my_offers: dict                         # Generated offers
-    received_offers: list                   # Received offers
+    progress: SessionProgress
+    bid_space: BidSpace                     # Utility table of the bid space
+    my_offers: dict                         # Number of times each bid index is offered
+    received_offers: array                  # Indices of received offers
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
+        self.bid_space = kwargs["bid_space"]
         self.my_offers = dict()
-        self.received_offers = []
+        self.received_offers = array("q")
 
     def receive_bid(self, bid: Bid, **kwargs):
         """
@@ -24,7 +26,7 @@ class BiddingStrategy:
         @return: None
         """
         if bid is not None:
-            self.received_offers.append(bid)
+            self.received_offers.append(self.bid_space.index_of(bid))
 
     def generate(self, last_generated_bid, **kwargs) -> Bid:
         """
@@ -40,19 +42,19 @@ class BiddingStrategy:
             target_utility = (-2/3) * time + 0.9
             # target_utility = 1. - time
             # Get the closest bid to Target Utility
-            bid = get_bid_greater_than(self.profile, target_utility, opponent_model, self.my_offers)
+            bid = get_bid_greater_than(self.bid_space, target_utility, opponent_model, self.my_offers)
             # print(time, target_utility, bid, get_utility(self.profile, bid))
 
         elif 0.3 <= time < 0.6:
             target_utility = 0.7
             opponent_model = kwargs["opponent_model"]
-            bid = get_bid_greater_than(self.profile, target_utility, opponent_model, self.my_offers)
+            bid = get_bid_greater_than(self.bid_space, target_utility, opponent_model, self.my_offers)
             # print(time, target_utility, bid, get_utility(self.profile, bid))
 
         else:
             target_utility = -0.75 * time + 1.15
             opponent_model = kwargs["opponent_model"]
-            bid = get_bid_greater_than(self.profile, target_utility, opponent_model, self.my_offers)
+            bid = get_bid_greater_than(self.bid_space, target_utility, opponent_model, self.my_offers)
             # print(time, target_utility, bid, get_utility(self.profile, bid))
 
         bid_util = get_utility(self.profile, bid)
@@ -60,37 +62,38 @@ class BiddingStrategy:
         if len(self.received_offers) > 7:
             if time < 0.7 and random.random() < 0.5:
                 mean_received_utility = 0
-                for received_bid in self.received_offers[-3:]:
-                    received_utility = get_utility(self.profile, received_bid)
+                for received_index in self.received_offers[-3:]:
+                    received_utility = self.bid_space.get_utility(received_index)
                     mean_received_utility += received_utility
 
                 mean_received_utility /= 3
                 behavior_dependent_util = 1 - mean_received_utility
-                behavior_bid = get_bid_greater_than(self.profile, behavior_dependent_util, opponent_model, self.my_offers)
+                behavior_bid = get_bid_greater_than(self.bid_space, behavior_dependent_util, opponent_model, self.my_offers)
                 if behavior_dependent_util > bid_util:
                     bid = behavior_bid
 
             elif time >= 0.7:
                 if random.random() < (2/3):
                     mean_received_utility = 0
-                    for received_bid in self.received_offers[-3:]:
-                        received_utility = get_utility(self.profile, received_bid)
+                    for received_index in self.received_offers[-3:]:
+                        received_utility = self.bid_space.get_utility(received_index)
                         mean_received_utility += received_utility
 
                     mean_received_utility /= 3
                     behavior_dependent_util = 1 - mean_received_utility
-                    behavior_bid = get_bid_greater_than(self.profile, behavior_dependent_util, opponent_model,
+                    behavior_bid = get_bid_greater_than(self.bid_space, behavior_dependent_util, opponent_model,
                                                         self.my_offers)
                     if behavior_dependent_util > bid_util:
                         bid = behavior_bid
                 else:
                     target_utility = 0.625
                     opponent_model = kwargs["opponent_model"]
-                    bid = get_bid_greater_than(self.profile, target_utility, opponent_model, self.my_offers)
+                    bid = get_bid_greater_than(self.bid_space, target_utility, opponent_model, self.my_offers)
 
-        if not bid in self.my_offers:
-            self.my_offers[bid] = 1
+        bid_index = self.bid_space.index_of(bid)
+        if not bid_index in self.my_offers:
+            self.my_offers[bid_index] = 1
         else:
-            self.my_offers[bid] += 1
+            self.my_offers[bid_index] += 1
 
         return bid
@@ -2,23 +2,30 @@ from agents.template_agent.utils import *
 import os
 import pickle
 
+from agents.storage.learning_store import LearningStore
+from agents.storage.model_state import load_model_state, save_model_state
+
 
 class LearningModel:
     """
         Learning Model
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
     received_bids: list                 # Received bids
     my_bids: list                       # Generated bids by Bidding Strategy
-    data: dict                          # Data will be saved.
+    data: dict                          # Data of the earlier sessions and of this session
+    record: dict                        # Data of this session, saved as one record
+    opponent_model: object              # Opponent model that is warm-started and saved, if given
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
         self.received_bids = []
         self.my_bids = []
         self.data = {}
+        self.record = {}
+        self.opponent_model = kwargs.get("opponent_model")
 
     def receive_bid(self, bid: Bid, **kwargs):
         if bid is not None:
@@ -27,6 +34,15 @@ class LearningModel:
     def save_bid(self, bid: Bid, **kwargs):
         self.my_bids.append(bid)
 
+    def set_data(self, key, value):
+        """
+            Set a value of the data that is saved for this session
+        @param key: Key of the value
+        @param value: Picklable value
+        """
+        self.record[key] = value
+        self.data[key] = value
+
     def reach_agreement(self, accepted_bid: Bid, opponent_accepted: bool, **kwargs):
         time = get_time(self.progress)
 
@@ -39,9 +55,15 @@ class LearningModel:
         if other is None or storage_dir is None:
             return
 
-        # Save the data as Pickle format.
-        with open(f"{storage_dir}/{other}_data.pkl", "wb") as f:
-            pickle.dump(self.data, f)
+        # Append only the data of this session, sessions against the same opponent may run at the same time
+        if len(self.record) > 0:
+            LearningStore(storage_dir, other).append(self.record)
+
+        # Learned opponent model, so that the next session against this opponent on this domain starts from it
+        if self.opponent_model is not None:
+            weights, counts, offers = self.opponent_model.get_state()
+            if offers > 0:
+                save_model_state(storage_dir, other, self.profile.getDomain(), weights, counts, offers)
 
     def load_data(self, storage_dir: str, other: str, **kwargs) -> dict:
         self.data = {}
@@ -50,9 +72,20 @@ class LearningModel:
         if storage_dir is None or other is None:
             return self.data
 
-        # Load corresponding data
+        # Load data that was saved as a single Pickle file by earlier versions
         if os.path.exists(f"{storage_dir}/{other}_data.pkl"):
             with open(f"{storage_dir}/{other}_data.pkl", "rb") as f:
                 self.data = pickle.load(f)
 
+        # Later sessions overwrite the keys of earlier sessions
+        for record in LearningStore(storage_dir, other).load():
+            self.data.update(record)
+
+        self.data.update(self.record)
+
+        if self.opponent_model is not None:
+            state = load_model_state(storage_dir, other, self.profile.getDomain())
+            if state is not None:
+                self.opponent_model.set_state(*state)
+
         return self.data
@@ -3,6 +3,8 @@ from geniusweb.issuevalue.DiscreteValueSet import DiscreteValueSet
 from geniusweb.issuevalue.Domain import Domain
 from geniusweb.issuevalue.Value import Value
 from agents.template_agent.utils import *
+from agents.bidspace.bid_codec import BidCodec
+import numpy as np
 
 
 class OpponentModel:
@@ -10,16 +12,20 @@ class OpponentModel:
         Opponent Model
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
-    offers: list    # Received bids
-    domain: Domain  # Agent's domain
-    issues: dict    # Issues
-
-    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    progress: SessionProgress
+    offers: list                    # Received bids
+    domain: Domain                  # Agent's domain
+    issues: dict                    # Issues
+    codec: BidCodec                 # Bid <-> index encoding
+    prior_offers: int = 0           # Offers of earlier sessions that the warm-start state was learned from
+    warm_start_offers: int = 20     # Stored counts are scaled to count as at most this many offers
+
+    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.domain = domain
         self.profile = profile
         self.progress = progress
         self.offers = []
+        self.codec = BidCodec(domain, canonical=True)
 
         self.issues = {issue: Issue(values) for issue, values in domain.getIssuesValues().items()}
         init_weight = 1 / len(self.issues)
@@ -79,6 +85,39 @@ class OpponentModel:
         # for issue_name, issue_obj in self.issues.items():
         #     print(issue_name, issue_obj)
 
+    def get_state(self) -> tuple:
+        """
+            State of the model that can warm-start a model of a later session
+        @return: Issue weights in codec issue order, value counts in the flat codec value layout, number of offers
+        """
+        weights = np.array([self.issues[issue].get_weight() for issue in self.codec.issues], dtype=np.float64)
+        counts = np.array([self.issues[issue].num_occurences.get(value, 0)
+                           for issue, values in zip(self.codec.issues, self.codec.values) for value in values],
+                          dtype=np.float64)
+
+        return weights, counts, self.prior_offers + len(self.offers)
+
+    def set_state(self, weights: np.ndarray, counts: np.ndarray, offers: int):
+        """
+            Start from the state of an earlier session. The counts are scaled down, so that offers of this session
+            soon outweigh them, in case the opponent uses another profile of the domain.
+        @param weights: Issue weights of get_state
+        @param counts: Value counts of get_state
+        @param offers: Number of offers of get_state
+        """
+        scale = min(1., self.warm_start_offers / offers) if offers > 0 else 0.
+        segments = np.split(counts, np.cumsum(self.codec.radices)[:-1])
+
+        for issue, values, weight, issue_counts in zip(self.codec.issues, self.codec.values, weights, segments):
+            issue_obj = self.issues[issue]
+            issue_obj.set_weight(float(weight))
+            issue_obj.num_occurences = {value: scale * float(count)
+                                        for value, count in zip(values, issue_counts) if count > 0}
+            issue_obj.max_occurences = max(issue_obj.num_occurences.values(), default=-1)
+            issue_obj.update_value_weights()
+
+        self.prior_offers = int(round(scale * offers))
+
     def get_utility(self, bid: Bid) -> float:
         """
             This method calculates estimated utility.
@@ -95,6 +134,29 @@ class OpponentModel:
 
         return total
 
+    def get_value_utilities(self) -> list:
+        """
+            Estimated weighted utility of every value, as one lookup array per issue. Arrays follow the issue and
+            value order of the bid codec, so they can be indexed with bid digits.
+        @return: List of float64 arrays
+        """
+        return [np.array([self.issues[issue].get_utility(value) for value in values], dtype=np.float64)
+                for issue, values in zip(self.codec.issues, self.codec.values)]
+
+    def get_utilities(self, bid_indices: np.ndarray) -> np.ndarray:
+        """
+            Estimated utilities of many bids at once
+        @param bid_indices: Indices of the bids in the layout of the codec
+        @return: Estimated utility of each bid as float64 array
+        """
+        digits = self.codec.digits_of(bid_indices)
+        total = np.zeros(len(digits), dtype=np.float64)
+
+        for k, value_utilities in enumerate(self.get_value_utilities()):
+            total += value_utilities[digits[:, k]]
+
+        return total
+
 class Issue:
     """
         This class can be used to estimate issue weight and value weights.
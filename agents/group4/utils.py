@@ -1,14 +1,15 @@
-import math
 import random
+from array import array
 
-from geniusweb.bidspace.AllBidsList import AllBidsList
+import numpy as np
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.progress.ProgressTime import ProgressTime
 from time import time
 
+from agents.bidspace.bid_space import BidSpace
+from agents.bidspace.progress import SessionProgress
 from agents.group4.opponent_model import OpponentModel
 
 """
@@ -26,126 +27,93 @@ def get_utility(profile: LinearAdditiveUtilitySpace, bid: Bid) -> float:
     return float(profile.getUtility(bid))
 
 
-def get_bid_greater_than(profile: LinearAdditiveUtilitySpace, utility: float, opponent_model: OpponentModel, my_offers: dict) -> Bid:
+def get_bid_greater_than(bid_space: BidSpace, utility: float, opponent_model: OpponentModel, my_offers: dict) -> Bid:
     """
     Get a bid that is greater than the utility and is prefered by the opponent. The bid have offered less than a
     certain amount of times in the offering history.
-    :param profile: Profile
+    :param bid_space: Bid space of the session
     :param utility: Utility
+    :param my_offers: Number of times each bid index has been offered
     :return: A bid with a utility greater than the given utility
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-    candidate_bids = []
+    # Bids that have been offered 5 times already
+    exhausted = [index for index, count in my_offers.items() if count >= 5]
+
+    if bid_space.utilities is None:
+        # Search the best bid for the opponent that is strictly above the utility
+        min_utility = float(np.nextafter(utility, np.inf))
+        opponent_utilities = opponent_model.get_value_utilities()
+
+        selected_index = bid_space.search.search_best(min_utility, opponent_utilities, set(exhausted))
+        if selected_index is None:
+            selected_index = bid_space.search.search_best(min_utility, opponent_utilities)
+
+        return bid_space.get(selected_index)
 
     # Gather bids with utility greater than the desired utility
-    for i in range(all_bids.size()):
-        if get_utility(profile, all_bids.get(i)) > utility:
-            candidate_bids.append(all_bids.get(i))
+    candidates = bid_space.utilities > utility
+    candidate_indices = np.flatnonzero(candidates)
 
     # From the candidate bids chose the one that is preferred by the opponent; however, we will not repeat the same offer
     # more than 5 times
-    max_op_util = -1000
+    candidates[exhausted] = False
+    eligible_indices = np.flatnonzero(candidates)
+
     selected_bid = None
-    for bid in candidate_bids:
-        op_util = opponent_model.get_utility(bid)
-        if op_util > max_op_util:
-            if bid in my_offers:
-                if my_offers[bid] < 5:
-                    selected_bid = bid
-                    max_op_util = op_util
-            else:
-                selected_bid = bid
-                max_op_util = op_util
+    if len(eligible_indices) > 0:
+        op_utils = opponent_model.get_utilities(eligible_indices)
+        selected_bid = bid_space.get(eligible_indices[int(np.argmax(op_utils))])
 
     if selected_bid is None:
-        selected_bid = random.choice(candidate_bids)
+        selected_bid = bid_space.get(random.choice(candidate_indices))
 
     return selected_bid
 
 
-def get_bid_at(profile: LinearAdditiveUtilitySpace, utility: float) -> Bid:
+def get_bid_at(bid_space: BidSpace, utility: float) -> Bid:
     """
         Get the closest bid to desired utility
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @param utility: Desired Utility
     @return: The closest bid to desired utility
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    closest = all_bids.get(0)
+    return bid_space.get(bid_space.get_closest_index(utility))
 
-    for i in range(all_bids.size()):
-        if abs(utility - get_utility(profile, all_bids.get(i))) < abs(utility - get_utility(profile, closest)):
-            closest = all_bids.get(i)
 
-    return closest
-
-
-def get_bids_at(profile: LinearAdditiveUtilitySpace, utility: float, lower_bound: float = 0.02,
-                upper_bound: float = 0.02) -> list:
+def get_bids_at(bid_space: BidSpace, utility: float, lower_bound: float = 0.02, upper_bound: float = 0.02) -> list:
     """
         Get bids between [utility - lower_bound, utility + upper_bound]
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @param utility: Desired Utility
     @param lower_bound: Lower bound of the Range
     @param upper_bound: Upper bound of the Range
     @return: List of bids in that range
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    bids = []
-
-    for i in range(1, all_bids.size()):
-        if utility - lower_bound <= get_utility(profile, all_bids.get(i)) <= utility + upper_bound:
-            bids.append(all_bids.get(i))
+    return [bid_space.get(i) for i in bid_space.get_indices_at(utility, lower_bound, upper_bound)]
 
-    return bids
 
-
-def get_min_max_utility(profile: LinearAdditiveUtilitySpace) -> (float, float):
+def get_min_max_utility(bid_space: BidSpace) -> (float, float):
     """
         Get the minimum and maximum utility value in bid space
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @return: Minimum and maximum utility as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    min_utility = 1.0
-    max_utility = 0.0
-
-    for i in range(all_bids.size()):
-        min_utility = min(get_utility(profile, all_bids.get(i)), min_utility)
-        max_utility = max(get_utility(profile, all_bids.get(i)), max_utility)
-
-    return min_utility, max_utility
+    return bid_space.stats.min, bid_space.stats.max
 
 
-def get_mean_stdev(profile: LinearAdditiveUtilitySpace) -> (float, float):
+def get_mean_stdev(bid_space: BidSpace) -> (float, float):
     """
         Mean and standard derivation of bid space
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @return: Mean and standard derivation values as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    utilities = [get_utility(profile, all_bids.get(i)) for i in range(all_bids.size())]
-
-    mean = sum(utilities) / len(utilities)
-
-    stdev = math.sqrt(sum([math.pow(utility - mean, 2.) for utility in utilities]) / len(utilities))
-
-    return mean, stdev
+    return bid_space.stats.mean, bid_space.stats.stdev
 
 
-def get_time(progress: ProgressTime) -> float:
+def get_time(progress: SessionProgress) -> float:
     """
         Get current time. Initially, it is 0; and it is 1 at the end of the negotiation.
-    @param progress: ProgressTime object to calculate t
+    @param progress: SessionProgress object to calculate t
     @return: Current time as float in range [0, 1]
     """
     return progress.get(int(time() * 1000))
@@ -6,11 +6,11 @@ class AcceptanceStrategy:
         AC_Next implementation.
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
     min_p2: float = 0.0
     epsilon: float = 0.05
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
 
@@ -9,27 +9,32 @@ class BiddingStrategy:
             https://www.researchgate.net/publication/357708964_Solver_Agent_Towards_Emotional_and_Opponent-Aware_Agent_for_Human-Robot_Negotiation
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
-    my_offers: list
-    received_offers: list
+    progress: SessionProgress
+    bid_space: SortedBidSpace
+    my_offers: array
+    received_offers: array
 
     p0: float = 1.0
     p1: float = 0.85
     p2: float = 0.4
     p3: float = 0.5
-    window_lower_bound: float = 0.02
-    window_upper_bound: float = 0.02
+    window_bids: int = 30               # Bids in the window around the target utility, sized from the histogram
+    window_max: float = 0.1             # Largest half width of the window
+    window_limit: int = 120             # Most bids gathered in the window of a searched bid space
+    window_lower_scale: float = 1.
+    window_upper_scale: float = 1.
     epsilon: float = 0.05
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
-        self.my_offers = []
-        self.received_offers = []
+        self.bid_space = kwargs["bid_space"]
+        self.my_offers = array("q")
+        self.received_offers = array("q")
 
     def receive_bid(self, bid: Bid, **kwargs):
         if bid is not None:
-            self.received_offers.append(bid)
+            self.received_offers.append(self.bid_space.index_of(bid))
 
     def generate(self, **kwargs) -> Bid:
         time = get_time(self.progress)
@@ -49,25 +54,24 @@ class BiddingStrategy:
 
         log_fn("Target Utility: %f" % target_utility)
 
-        bids = get_bids_at(self.profile, target_utility, self.window_lower_bound, self.window_upper_bound)
-
-        if len(bids) > 0:
-            selected_bid = bids[0]
+        window = self.bid_space.histogram.get_window(target_utility, self.window_bids, self.window_max)
+        indices = self.bid_space.get_indices_at(target_utility, window * self.window_lower_scale,
+                                                window * self.window_upper_scale, self.window_limit)
 
+        if len(indices) > 0:
             opponent_model = kwargs["opponent_model"]
 
-            for bid in bids:
-                if opponent_model.get_utility(bid) * get_utility(self.profile, bid) > \
-                        opponent_model.get_utility(selected_bid) * get_utility(self.profile, selected_bid):
-                    selected_bid = bid
+            nash_products = opponent_model.get_utilities(indices) * self.bid_space.get_utilities(indices)
+
+            selected_index = int(indices[int(np.argmax(nash_products))])
         else:
-            selected_bid = get_bid_at(self.profile, target_utility)
+            selected_index = self.bid_space.get_closest_index(target_utility)
 
-        self.my_offers.append(selected_bid)
+        self.my_offers.append(selected_index)
 
-        log_fn("Offered Bid: %f" % get_utility(self.profile, selected_bid))
+        log_fn("Offered Bid: %f" % self.bid_space.get_utility(selected_index))
 
-        return selected_bid
+        return self.bid_space.get(selected_index)
 
     def time_based(self, time: float, log_fn) -> float:
         utility = (1 - time) * (1 - time) * self.p0 + \
@@ -86,50 +90,41 @@ class BiddingStrategy:
             4: [0.05, 0.15, 0.3, 0.5],
         }
 
-        diff = [get_utility(self.profile, self.received_offers[i + 1]) - get_utility(self.profile, self.received_offers[i])
-                for i in range(len(self.received_offers) - 1)]
+        received_utilities = self.bid_space.get_utilities(self.received_offers[:len(W) + 1])
+
+        diff = [received_utilities[i + 1] - received_utilities[i] for i in range(len(received_utilities) - 1)]
 
         if len(diff) > len(W):
             diff = diff[:len(W)]
 
         delta = sum([u * w for u, w in zip(diff, W[len(diff)])])
 
-        utility = get_utility(self.profile, self.my_offers[-1]) - (self.p3 + self.p3 * time) * delta
+        utility = self.bid_space.get_utility(self.my_offers[-1]) - (self.p3 + self.p3 * time) * delta
 
         log_fn("Behaviour Based: %f" % utility)
 
         return utility
 
     def update(self, learned_data: list, log_fn):
-        domain_size = AllBidsList(self.profile.getDomain()).size()
+        domain_size = self.bid_space.size()
 
         if domain_size < 450:
             self.p2 = 0.85
-            self.window_upper_bound = 0.1
-            self.window_lower_bound = 0.1
         elif domain_size < 1500:
             self.p2 = 0.825
-            self.window_upper_bound = 0.05
-            self.window_lower_bound = 0.05
         elif domain_size < 4500:
             self.p2 = 0.8
-            self.window_upper_bound = 0.025
-            self.window_lower_bound = 0.025
         elif domain_size < 18000:
             self.p2 = 0.725
-            self.window_lower_bound = 0.0125
-            self.window_upper_bound = 0.0125
         elif domain_size < 33000:
             self.p2 = 0.65
-            self.window_upper_bound = 0.0063
-            self.window_lower_bound = 0.0063
         else:
             self.p2 = 0.60
-            self.window_upper_bound = 0.0031
-            self.window_lower_bound = 0.0031
 
         self.p1 = 0.85
-        min_utility, max_utility = get_min_max_utility(self.profile)
+        self.window_lower_scale = 1.
+        self.window_upper_scale = 1.
+        min_utility, max_utility = get_min_max_utility(self.bid_space)
 
         if len(learned_data) >= 2:
             previous_data = learned_data[-2]
@@ -142,8 +137,8 @@ class BiddingStrategy:
             if current_data["domain_size"] > previous_data["domain_size"] and \
                     abs(previous_data["p1"] - current_data["p1"]) <= self.epsilon:
                 self.p1 += 0.05
-                self.window_upper_bound *= 2.
-                self.window_lower_bound *= .5
+                self.window_upper_scale = 2.
+                self.window_lower_scale = .5
             if abs(previous_data["opponent_acceptance_time"] - current_data["opponent_acceptance_time"]) <= 0.01 and \
                     previous_data["opponent_acceptance_time"] != -1 and current_data["opponent_acceptance_time"] != -1:
                 self.p1 += 0.05
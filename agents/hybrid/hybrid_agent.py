@@ -9,7 +9,6 @@ from geniusweb.actions.Action import Action
 from geniusweb.actions.LearningDone import LearningDone
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -42,11 +41,13 @@ class HybridAgent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
-        self.progress: ProgressTime = None
+        self.progress: SessionProgress = None
         self.me: PartyId = None
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.profile_uri: str = None
+        self.bid_space: SortedBidSpace = None
 
         self.last_received_bid: Bid = None
         self.last_generated_bid: Bid = None
@@ -62,7 +63,7 @@ class HybridAgent(DefaultParty):
             self.settings = cast(Settings, data)
             self.me = self.settings.getID()
 
-            self.progress = self.settings.getProgress()
+            self.progress = SessionProgress(self.settings.getProgress())
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
@@ -73,6 +74,7 @@ class HybridAgent(DefaultParty):
                 self.getConnection().send(LearningDone(self.me))
                 return
 
+            self.profile_uri = str(data.getProfile().getURI())
             profile_connection = ProfileConnectionFactory.create(
                 data.getProfile().getURI(), self.getReporter()
             )
@@ -100,6 +102,7 @@ class HybridAgent(DefaultParty):
                 self.receive_action(action)
         elif isinstance(data, YourTurn):
             self.take_action()
+            self.progress.advance()
 
         elif isinstance(data, Finished):
             if self.learning_model is not None:
@@ -115,8 +118,10 @@ class HybridAgent(DefaultParty):
         self.last_generated_bid = None
         self.last_received_bid = None
 
+        self.bid_space = SortedBidSpace(self.profile, self.profile_uri)
+
         self.opponent_model = OpponentModel(self.domain, self.profile, self.progress, log=self.log)
-        self.bidding_strategy = BiddingStrategy(self.profile, self.progress)
+        self.bidding_strategy = BiddingStrategy(self.profile, self.progress, bid_space=self.bid_space)
         self.acceptance_strategy = AcceptanceStrategy(self.profile, self.progress)
         self.learning_model = LearningModel(self.profile, self.progress, opponent_model=self.opponent_model)
 
@@ -149,7 +154,7 @@ class HybridAgent(DefaultParty):
                 self.opponent_model = OpponentModel(self.domain, self.profile, self.progress, log=self.log)
 
             if self.bidding_strategy is None:
-                self.bidding_strategy = BiddingStrategy(self.profile, self.progress)
+                self.bidding_strategy = BiddingStrategy(self.profile, self.progress, bid_space=self.bid_space)
 
             bid = cast(Offer, action).getBid()
 
@@ -2,28 +2,48 @@ from agents.hybrid.utils import *
 from agents.hybrid.opponent_model import OpponentModel
 import os
 import pickle
+
 import numpy as np
-from numpy.linalg import inv
+
+from agents.storage.learning_store import LearningStore
+from agents.storage.model_state import load_model_state, save_model_state
+
+HISTORY_LIMIT = 10      # Sessions kept per opponent, the strategies compare the last two
 
 
 class LearningModel:
     """
         Save only minimum observed utility.
+
+        The concession curve of the opponent is fitted as a quadratic Bezier curve from its maximum observed utility
+        p0 to its minimum observed utility p2, with a least-squares control point p1 over the received bids:
+
+            target(t, u) = (u - (1 - t)^2 * p0 - t^2 * p2) / (2 * (1 - t))
+            p1 = sum(t * target) / sum(t^2)
+
+        Utilities are those of the final opponent model. The received bids are kept as indices, so p0 and p2 are one
+        vectorized evaluation when saving. The sums of the fit are expanded into terms that do not depend on p0 and
+        p2 and are updated as bids arrive; the utility term is kept per issue value and weighted by the opponent
+        model when saving.
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
-    received_bids: list
+    progress: SessionProgress
     my_bids: list
     acceptance_time: float
     accepted_bid: Bid
     opponent_accepted: bool
     opponent_model: OpponentModel
     data: list
-
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    received: array                 # Index of each received bid in the codec of the opponent model
+    sum_tt: float                   # sum(t^2)
+    sum_p0: float                   # sum(t * (1 - t)), coefficient of p0
+    sum_p2: float                   # sum(t^3 / (1 - t)), coefficient of p2
+    sum_values: np.ndarray          # sum(t / (1 - t)) of the bids with each value, in the flat value layout
+    offsets: np.ndarray             # Start of each issue's values in sum_values
+
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
-        self.received_bids = []
         self.my_bids = []
         self.opponent_model = kwargs["opponent_model"]
         self.data = []
@@ -31,11 +51,28 @@ class LearningModel:
         self.opponent_accepted = False
         self.accepted_bid = None
 
+        radices = self.opponent_model.codec.radices
+        self.received = array("q")
+        self.sum_tt = 0.
+        self.sum_p0 = 0.
+        self.sum_p2 = 0.
+        self.sum_values = np.zeros(int(np.sum(radices)), dtype=np.float64)
+        self.offsets = np.concatenate([[0], np.cumsum(radices)[:-1]]).astype(np.int64)
+
     def receive_bid(self, bid: Bid, **kwargs):
         if bid is not None:
             time = get_time(self.progress)
 
-            self.received_bids.append([time, bid])
+            self.received.append(self.opponent_model.codec.encode(bid))
+
+            # The target is undefined at the deadline
+            if time < 1.:
+                digits = np.array(self.opponent_model.codec.to_digits_of_bid(bid), dtype=np.int64)
+
+                self.sum_tt += time * time
+                self.sum_p0 += time * (1. - time)
+                self.sum_p2 += time ** 3 / (1. - time)
+                self.sum_values[self.offsets + digits] += time / (1. - time)
 
     def save_bid(self, bid: Bid, **kwargs):
         self.my_bids.append(bid)
@@ -47,41 +84,46 @@ class LearningModel:
         self.opponent_accepted = opponent_accepted
         self.acceptance_time = time
 
-    def save_data(self, storage_dir: str, other: str, **kwargs):
-        if other is None or storage_dir is None or len(self.received_bids) < 1:
-            return
-
-        domain_size = AllBidsList(self.profile.getDomain()).size()
-        utilities = []
-        times = []
+    def get_p1(self, p0: float, p2: float) -> float:
+        """
+            Least-squares control point of the concession curve, from the statistics of the received bids
+        @param p0: Start of the curve, maximum observed utility
+        @param p2: End of the curve, minimum observed utility
+        @return: p1, 0 if no bid was received before the deadline after the start
+        """
+        if self.sum_tt <= 0.:
+            return 0.
 
-        for t, bid in self.received_bids:
-            utility = self.opponent_model.get_utility(bid)
+        sum_tu = float(np.dot(np.concatenate(self.opponent_model.get_value_utilities()), self.sum_values))
+        sum_target = .5 * (sum_tu - p0 * self.sum_p0 - p2 * self.sum_p2)
 
-            utilities.append(utility)
-            times.append(t)
+        return sum_target / self.sum_tt
 
-        p0 = max(utilities)
-        p2 = min(utilities)
-
-        def target_fn(t, utility):
-            return (utility - (1 - t) * (1 - t) * p0 - t * t * p2) / (2. * (1 - t))
+    def save_data(self, storage_dir: str, other: str, **kwargs):
+        if other is None or storage_dir is None or len(self.received) < 1:
+            return
 
-        target = [target_fn(times[i], utilities[i]) for i in range(len(utilities))]
+        domain_size = self.opponent_model.codec.size
 
-        X = np.reshape(np.array(times, dtype=np.float32), (len(times), 1))
-        Y = np.reshape(np.array(target, dtype=np.float32), (len(target), 1))
+        utilities = self.opponent_model.get_utilities(np.frombuffer(self.received, dtype=np.int64))
 
-        p1 = float(inv((X.transpose().dot(X))).dot(X.transpose().dot(Y)))
+        p0 = float(np.max(utilities))
+        p2 = float(np.min(utilities))
+        p1 = self.get_p1(p0, p2)
 
         opponent_acceptance_time = -1 if not self.opponent_accepted or self.accepted_bid is None \
             else self.acceptance_time
 
-        self.data.append({"p0": p0, "p1": p1, "p2": p2, "domain_size": domain_size,
-                          "opponent_acceptance_time": opponent_acceptance_time})
+        record = {"p0": p0, "p1": p1, "p2": p2, "domain_size": domain_size,
+                  "opponent_acceptance_time": opponent_acceptance_time}
+        self.data.append(record)
+
+        # Only the record of this session is written, sessions against the same opponent may run at the same time
+        LearningStore(storage_dir, other, limit=HISTORY_LIMIT).append(record)
 
-        with open(f"{storage_dir}/{other}_data.pkl", "wb") as f:
-            pickle.dump(self.data, f)
+        # Learned opponent model, so that the next session against this opponent on this domain starts from it
+        weights, counts, offers = self.opponent_model.get_state()
+        save_model_state(storage_dir, other, self.profile.getDomain(), weights, counts, offers)
 
     def load_data(self, storage_dir: str, other: str, **kwargs) -> list:
         self.data = []
@@ -89,8 +131,16 @@ class LearningModel:
         if storage_dir is None or other is None:
             return self.data
 
+        # Records that were saved as a single Pickle file by earlier versions come first
         if os.path.exists(f"{storage_dir}/{other}_data.pkl"):
             with open(f"{storage_dir}/{other}_data.pkl", "rb") as f:
                 self.data = pickle.load(f)
 
+        self.data += LearningStore(storage_dir, other, limit=HISTORY_LIMIT).load()
+        self.data = self.data[-HISTORY_LIMIT:]
+
+        state = load_model_state(storage_dir, other, self.profile.getDomain())
+        if state is not None:
+            self.opponent_model.set_state(*state)
+
         return self.data
@@ -1,11 +1,84 @@
 import math
+from collections import deque
 
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.issuevalue.DiscreteValueSet import DiscreteValueSet
 from geniusweb.issuevalue.Domain import Domain
 from geniusweb.issuevalue.Value import Value
 from agents.hybrid.utils import *
-from scipy.stats import chisquare
+from agents.bidspace.bid_codec import BidCodec
+import numpy as np
+from scipy.stats import chi2
+
+
+class WindowFrequency:
+    """
+        Value counts of the current and the previous window of received bids, for all issues at once. The values of
+        all issues are laid out in one flat array; each issue has its own segment. Counts are updated as bids enter
+        the current window, move to the previous one and leave it, so comparing windows never rescans bids.
+    """
+    window_size: int
+    offsets: np.ndarray     # Start of each issue's segment in the flat arrays
+    degrees_of_freedom: np.ndarray
+    current: np.ndarray     # Value counts of the current window
+    previous: np.ndarray    # Value counts of the previous window
+    bids: deque             # Flat value positions of the bids in both windows, oldest first
+
+    def __init__(self, num_values: np.ndarray, window_size: int):
+        self.window_size = window_size
+        self.offsets = np.concatenate([[0], np.cumsum(num_values)[:-1]]).astype(np.int64)
+        self.degrees_of_freedom = np.asarray(num_values) - 1
+        self.current = np.zeros(int(np.sum(num_values)), dtype=np.float64)
+        self.previous = np.zeros(int(np.sum(num_values)), dtype=np.float64)
+        self.bids = deque()
+
+    def add(self, digits: np.ndarray):
+        """
+            Add a received bid to the current window
+        @param digits: Value index of each issue
+        @return: None
+        """
+        positions = self.offsets + digits
+        self.bids.append(positions)
+        self.current[positions] += 1.
+
+        # The oldest bid of the current window moves to the previous window
+        if len(self.bids) > self.window_size:
+            moved = self.bids[-self.window_size - 1]
+            self.current[moved] -= 1.
+            self.previous[moved] += 1.
+
+        # The oldest bid of the previous window leaves
+        if len(self.bids) > 2 * self.window_size:
+            left = self.bids.popleft()
+            self.previous[left] -= 1.
+
+    def get_frequencies(self, counts: np.ndarray) -> np.ndarray:
+        """
+            Smoothed value frequencies, (1 + count) / window_size
+        @param counts: Value counts of a window
+        @return: Frequencies in the flat layout
+        """
+        return (1. + counts) / self.window_size
+
+    def sum_per_issue(self, values: np.ndarray) -> np.ndarray:
+        """
+            Sum of each issue's segment
+        @param values: Array in the flat layout
+        @return: One sum for each issue
+        """
+        return np.add.reduceat(values, self.offsets)
+
+    def chisquare(self, observed: np.ndarray, expected: np.ndarray) -> np.ndarray:
+        """
+            Pearson's chi-square test of each issue, same as scipy.stats.chisquare on each segment
+        @param observed: Observed frequencies in the flat layout
+        @param expected: Expected frequencies in the flat layout
+        @return: p-value of each issue
+        """
+        statistics = self.sum_per_issue((observed - expected) ** 2 / expected)
+
+        return chi2.sf(statistics, self.degrees_of_freedom)
 
 
 class OpponentModel:
@@ -17,20 +90,26 @@ class OpponentModel:
     offers: list
     domain: Domain
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
     issues: dict
+    codec: BidCodec
+    frequency: WindowFrequency
     alpha: float = .1
     beta: float = 5.
     window_size: int = 5
+    prior_offers: int = 0           # Offers of earlier sessions that the warm-start state was learned from
+    warm_start_offers: int = 20     # Stored counts are scaled to count as at most this many offers
 
-    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.domain = domain
         self.profile = profile
         self.progress = progress
         self.offers = []
+        self.codec = BidCodec(domain, canonical=True)
 
         self.issues = {issue: Issue(values, n=len(domain.getIssuesValues().keys()))
                        for issue, values in domain.getIssuesValues().items()}
+        self.frequency = WindowFrequency(self.codec.radices, self.window_size)
 
         self.log_fn = kwargs["log"]
 
@@ -46,56 +125,71 @@ class OpponentModel:
         for issue_name, issue_obj in self.issues.items():
             issue_obj.update(bid.getValue(issue_name), previous_value=previous_bid[issue_name], **kwargs)
 
-        if len(self.offers) % self.window_size == 0 and len(self.offers) > self.window_size:
-            current_window = self.offers[-self.window_size:]
-            previous_window = self.offers[-2 * self.window_size:-self.window_size]
+        self.frequency.add(np.array(self.codec.to_digits_of_bid(bid), dtype=np.int64))
 
-            self.update_issues(previous_window, current_window)
+        if len(self.offers) % self.window_size == 0 and len(self.offers) > self.window_size:
+            self.update_issues()
 
             self.log_fn("Issue Weights updated.")
 
-    def update_issues(self, previous_window: list, current_window: list):
+    def update_issues(self):
         time = get_time(self.progress)
-        not_changed = []
-        concession = False
-
-        def frequency(window: list, issue_name: str, issue_obj: Issue):
-            values = []
+        issues = [self.issues[issue] for issue in self.codec.issues]
 
-            for value in issue_obj.value_weights.keys():
-                total = 0.
+        fr_current = self.frequency.get_frequencies(self.frequency.current)
+        fr_previous = self.frequency.get_frequencies(self.frequency.previous)
 
-                for bid in window:
-                    if bid.getValue(issue_name) == value:
-                        total += 1.
+        # Chi-square test of the previous window against the current one, for all issues at once
+        p_values = self.frequency.chisquare(fr_previous, fr_current)
+        not_changed = p_values > 0.05
 
-                values.append((1. + total) / (len(window)))
+        value_weights = np.concatenate([issue_obj.get_value_weights() for issue_obj in issues])
+        estimated_current = self.frequency.sum_per_issue(fr_current * value_weights)
+        estimated_previous = self.frequency.sum_per_issue(fr_previous * value_weights)
 
-            return values
-
-        for issue_name, issue_obj in self.issues.items():
-            fr_current = frequency(current_window, issue_name, issue_obj)
-            fr_previous = frequency(previous_window, issue_name, issue_obj)
-            p_val = chisquare(fr_previous, fr_current)[1]
+        concession = bool(np.any(~not_changed & (estimated_current < estimated_previous)))
 
-            if p_val > 0.05:
-                not_changed.append(issue_obj)
-            else:
-                estimated_current = sum([fr_current[i] * w for i, w in enumerate(issue_obj.value_weights.values())])
-                estimated_previous = sum([fr_previous[i] * w for i, w in enumerate(issue_obj.value_weights.values())])
-
-                if estimated_current < estimated_previous:
-                    concession = True
-
-        if len(not_changed) != len(self.issues) and concession:
-            for issue_obj in not_changed:
-                issue_obj.weight += self.alpha * (1. - math.pow(time, self.beta))
+        if not np.all(not_changed) and concession:
+            for issue_obj, unchanged in zip(issues, not_changed):
+                if unchanged:
+                    issue_obj.weight += self.alpha * (1. - math.pow(time, self.beta))
 
         total_issue_weights = sum([issue_obj.weight for issue_obj in self.issues.values()])
 
         for issue_obj in self.issues.values():
             issue_obj.weight /= total_issue_weights
 
+    def get_state(self) -> tuple:
+        """
+            State of the model that can warm-start a model of a later session
+        @return: Issue weights in codec issue order, value counts in the flat codec value layout, number of offers
+        """
+        issues = [self.issues[issue] for issue in self.codec.issues]
+        weights = np.array([issue_obj.weight for issue_obj in issues], dtype=np.float64)
+        counts = np.concatenate([issue_obj.value_counter - 1. for issue_obj in issues])
+
+        return weights, counts, self.prior_offers + len(self.offers)
+
+    def set_state(self, weights: np.ndarray, counts: np.ndarray, offers: int):
+        """
+            Start from the state of an earlier session. The counts are scaled down, so that offers of this session
+            soon outweigh them, in case the opponent uses another profile of the domain.
+        @param weights: Issue weights of get_state
+        @param counts: Value counts of get_state
+        @param offers: Number of offers of get_state
+        """
+        scale = min(1., self.warm_start_offers / offers) if offers > 0 else 0.
+        segments = np.split(counts, np.cumsum(self.codec.radices)[:-1])
+
+        for issue, weight, issue_counts in zip(self.codec.issues, weights, segments):
+            issue_obj = self.issues[issue]
+            issue_obj.weight = float(weight)
+            issue_obj.value_counter = 1. + scale * issue_counts
+            issue_obj.max_count = float(np.max(issue_obj.value_counter))
+            issue_obj.value_weights = None
+
+        self.prior_offers = int(round(scale * offers))
+
     def get_utility(self, bid: Bid) -> float:
         if bid is None:
             return 0
@@ -107,16 +201,44 @@ class OpponentModel:
 
         return total
 
+    def get_value_utilities(self) -> list:
+        """
+            Estimated weighted utility of every value, as one lookup array per issue. Arrays follow the issue and
+            value order of the bid codec, so they can be indexed with bid digits.
+        @return: List of float64 arrays
+        """
+        return [self.issues[issue].weight * self.issues[issue].get_value_weights() for issue in self.codec.issues]
+
+    def get_utilities(self, bid_indices: np.ndarray) -> np.ndarray:
+        """
+            Estimated utilities of many bids at once
+        @param bid_indices: Indices of the bids in the layout of the codec
+        @return: Estimated utility of each bid as float64 array
+        """
+        digits = self.codec.digits_of(bid_indices)
+        total = np.zeros(len(digits), dtype=np.float64)
+
+        for k, value_utilities in enumerate(self.get_value_utilities()):
+            total += value_utilities[digits[:, k]]
+
+        return total
+
 
 class Issue:
     weight: float = 0.0
-    value_weights: dict
-    value_counter: dict
+    values: list
+    value_indices: dict
+    value_counter: np.ndarray
+    max_count: float
+    value_weights: np.ndarray
     gamma: float = .25
 
     def __init__(self, values: DiscreteValueSet, **kwargs):
-        self.value_weights = {value: 1. for value in values}
-        self.value_counter = {value: 1. for value in values}
+        self.values = list(values)
+        self.value_indices = {value: i for i, value in enumerate(self.values)}
+        self.value_counter = np.ones(len(self.values), dtype=np.float64)
+        self.max_count = 1.
+        self.value_weights = None
 
         self.weight = 1. / kwargs["n"]
 
@@ -124,15 +246,27 @@ class Issue:
         if value is None:
             return
 
-        self.value_counter[value] += 1.
+        i = self.value_indices[value]
+        self.value_counter[i] += 1.
+
+        if self.value_counter[i] > self.max_count:
+            self.max_count = self.value_counter[i]
+
+        # Value weights are normalized lazily, when the model is queried.
+        self.value_weights = None
 
-        max_value = max(self.value_counter.values())
+    def get_value_weights(self) -> np.ndarray:
+        """
+            Value weights, count^gamma / max_count^gamma, in the order of values
+        @return: Value weights as float64 array
+        """
+        if self.value_weights is None:
+            self.value_weights = np.power(self.value_counter / self.max_count, self.gamma)
 
-        self.value_weights = {value: math.pow(self.value_counter[value], self.gamma) / math.pow(max_value, self.gamma)
-                              for value in self.value_weights.keys()}
+        return self.value_weights
 
     def get_utility(self, value: Value) -> float:
         if value is None:
             return 0.
 
-        return self.weight * self.value_weights[value]
+        return self.weight * float(self.get_value_weights()[self.value_indices[value]])
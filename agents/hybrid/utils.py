@@ -1,13 +1,16 @@
-import math
+from array import array
 
-from geniusweb.bidspace.AllBidsList import AllBidsList
+import numpy as np
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.progress.ProgressTime import ProgressTime
 from time import time
 
+from agents.bidspace.artifacts import BidSpaceArtifacts
+from agents.bidspace.bid_space import SEARCH_LIMIT, BidSpace
+from agents.bidspace.histogram import UtilityHistogram
+from agents.bidspace.progress import SessionProgress
 
 """
     Some useful functions
@@ -24,88 +27,118 @@ def get_utility(profile: LinearAdditiveUtilitySpace, bid: Bid) -> float:
     return float(profile.getUtility(bid))
 
 
-def get_bid_at(profile: LinearAdditiveUtilitySpace, utility: float) -> Bid:
+class SortedBidSpace(BidSpace):
+    """
+        Bid space of the session with an index of bids sorted by own utility, so window and closest-bid queries on the
+        utility table are binary searches. The index is memory mapped from the precomputed artifacts of the profile
+        file along with the table. A histogram of own utility sizes the bidding windows.
+    """
+    histogram: UtilityHistogram             # Number of bids per own utility bin
+    order: np.ndarray                       # Bid indices sorted by own utility, None for searched bid spaces
+    sorted_utilities: np.ndarray            # utilities[order]
+
+    def __init__(self, profile: LinearAdditiveUtilitySpace, profile_uri: str = None):
+        self.order = None
+        self.sorted_utilities = None
+
+        super().__init__(profile, profile_uri)
+
+        self.histogram = UtilityHistogram(self.search.utilities)
+
+    def set_table(self, artifacts: BidSpaceArtifacts = None):
+        """
+            Set up the utility table and the index sorted by utility
+        @param artifacts: Precomputed artifacts of the profile, None to tabulate the bid space
+        """
+        if artifacts is not None:
+            self.utilities, self.order, self.sorted_utilities = artifacts
+        else:
+            super().set_table()
+            self.order = np.argsort(self.utilities, kind="stable")
+            self.sorted_utilities = self.utilities[self.order]
+
+    def get_indices_at(self, utility: float, lower_bound: float, upper_bound: float,
+                       limit: int = SEARCH_LIMIT) -> np.ndarray:
+        """
+            Indices of the bids between [utility - lower_bound, utility + upper_bound], in order of utility
+        @param utility: Desired Utility
+        @param lower_bound: Lower bound of the Range
+        @param upper_bound: Upper bound of the Range
+        @param limit: Maximum number of bids a searched bid space returns, which also bounds the cost of the search
+        @return: Bid indices in that range
+        """
+        if self.utilities is None:
+            return super().get_indices_at(utility, lower_bound, upper_bound, limit)
+
+        start = np.searchsorted(self.sorted_utilities, utility - lower_bound, side="left")
+        end = np.searchsorted(self.sorted_utilities, utility + upper_bound, side="right")
+
+        return self.order[start:end]
+
+    def get_closest_index(self, utility: float) -> int:
+        """
+            Index of the bid whose utility is the closest to the desired utility
+        @param utility: Desired Utility
+        @return: Bid index
+        """
+        if self.utilities is None:
+            return super().get_closest_index(utility)
+
+        position = int(np.searchsorted(self.sorted_utilities, utility))
+
+        if position == len(self.sorted_utilities):
+            position -= 1
+        elif position > 0 and \
+                utility - self.sorted_utilities[position - 1] <= self.sorted_utilities[position] - utility:
+            position -= 1
+
+        return int(self.order[position])
+
+
+def get_bid_at(bid_space: SortedBidSpace, utility: float) -> Bid:
     """
         Get the closest bid to desired utility
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @param utility: Desired Utility
     @return: The closest bid to desired utility
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    closest = all_bids.get(0)
-
-    for i in range(all_bids.size()):
-        if abs(utility - get_utility(profile, all_bids.get(i))) < abs(utility - get_utility(profile, closest)):
-            closest = all_bids.get(i)
+    return bid_space.get(bid_space.get_closest_index(utility))
 
-    return closest
 
-
-def get_bids_at(profile: LinearAdditiveUtilitySpace, utility: float, lower_bound: float = 0.02,
-                upper_bound: float = 0.02) -> list:
+def get_bids_at(bid_space: SortedBidSpace, utility: float, lower_bound: float = 0.02, upper_bound: float = 0.02) -> list:
     """
         Get bids between [utility - lower_bound, utility + upper_bound]
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @param utility: Desired Utility
     @param lower_bound: Lower bound of the Range
     @param upper_bound: Upper bound of the Range
     @return: List of bids in that range
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    bids = []
-
-    for i in range(1, all_bids.size()):
-        if utility - lower_bound <= get_utility(profile, all_bids.get(i)) <= utility + upper_bound:
-            bids.append(all_bids.get(i))
-
-    return bids
+    return [bid_space.get(i) for i in bid_space.get_indices_at(utility, lower_bound, upper_bound)]
 
 
-def get_min_max_utility(profile: LinearAdditiveUtilitySpace) -> (float, float):
+def get_min_max_utility(bid_space: BidSpace) -> (float, float):
     """
         Get the minimum and maximum utility value in bid space
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @return: Minimum and maximum utility as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    min_utility = 1.0
-    max_utility = 0.0
-
-    for i in range(all_bids.size()):
-        min_utility = min(get_utility(profile, all_bids.get(i)), min_utility)
-        max_utility = max(get_utility(profile, all_bids.get(i)), max_utility)
+    return bid_space.stats.min, bid_space.stats.max
 
-    return min_utility, max_utility
 
-
-def get_mean_stdev(profile: LinearAdditiveUtilitySpace) -> (float, float):
+def get_mean_stdev(bid_space: BidSpace) -> (float, float):
     """
         Mean and standard derivation of bid space
-    @param profile: Profile
+    @param bid_space: Bid space of the session
     @return: Mean and standard derivation values as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    utilities = [get_utility(profile, all_bids.get(i)) for i in range(all_bids.size())]
-
-    mean = sum(utilities) / len(utilities)
-
-    stdev = math.sqrt(sum([math.pow(utility - mean, 2.) for utility in utilities]) / len(utilities))
-
-    return mean, stdev
+    return bid_space.stats.mean, bid_space.stats.stdev
 
 
-def get_time(progress: ProgressTime) -> float:
+def get_time(progress: SessionProgress) -> float:
     """
         Get current time. Initially, it is 0; and it is 1 at the end of the negotiation.
-    @param progress: ProgressTime object to calculate t
+    @param progress: SessionProgress object to calculate t
     @return: Current time as float in range [0, 1]
     """
     return progress.get(int(time() * 1000))
@@ -0,0 +1,24 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def replace_file(path: Path, write):
+    """
+        Write a file through a temporary file in the same directory, flush it to disk and move it into place, so
+        readers see either the old or the new content
+    @param path: Destination path
+    @param write: Function that writes the content to a binary file object
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,148 @@
+import os
+import pickle
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from agents.storage.files import replace_file
+
+"""
+    Append-only storage of learning data that is safe for sessions running at the same time. The data about an
+    opponent is a directory of pickle files:
+
+        {storage_dir}/{other}_data/<time>-<pid>-<token>.shard.pkl     One record, written by one session
+        {storage_dir}/{other}_data/compacted.pkl                      Records of merged shards
+
+    Every session writes a new shard through a temporary file and moves it into place, so a save costs the same no
+    matter how long the history is and never overwrites another session's data. Loading merges the compacted records
+    with the shards in order of their names. Once enough shards piled up, the loader merges them into the compacted
+    file under a lock file and removes them. The compacted file names the shards it contains, so a reader that
+    lists a shard right before its removal does not count it twice. With a limit, only the latest records are kept
+    when compacting.
+"""
+
+COMPACT_SHARDS = 16         # Number of shards from which a load merges them into the compacted file
+LOCK_TIMEOUT_S = 60.        # Age after which a lock file is considered to be left behind by a crashed process
+LOAD_ATTEMPTS = 10          # A load starts over when a shard is removed by a compaction while it is read
+
+SHARD_SUFFIX = ".shard.pkl"
+COMPACTED_FILE = "compacted.pkl"
+LOCK_FILE = ".lock"
+
+
+class LearningStore:
+    """
+        Append-only learning data about one opponent
+    """
+    directory: Path
+    limit: Optional[int]    # Number of latest records that are kept, all records if None
+
+    def __init__(self, storage_dir: str, other: str, limit: Optional[int] = None):
+        self.directory = Path(storage_dir, f"{other}_data")
+        self.limit = limit
+
+    def append(self, record):
+        """
+            Store a record as a new shard
+        @param record: Picklable record of a session
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}{SHARD_SUFFIX}"
+        replace_file(self.directory.joinpath(name), lambda f: pickle.dump(record, f))
+
+    def load(self) -> list:
+        """
+            Read the records, oldest first. Compacts the shards if there are many of them.
+        @return: List of records, at most limit of them
+        """
+        if not self.directory.exists():
+            return []
+
+        for _ in range(LOAD_ATTEMPTS):
+            # shards are listed before the compacted file is read, so a shard is either in the list or in the file
+            shard_names = self._shard_names()
+            compacted = self._read_compacted()
+
+            try:
+                shards = {name: self._read(name) for name in shard_names if name not in compacted["merged"]}
+            except FileNotFoundError:
+                continue
+
+            records = compacted["records"] + list(shards.values())
+            if self.limit is not None:
+                records = records[-self.limit:]
+
+            if len(shards) >= COMPACT_SHARDS:
+                self._compact(compacted["generation"], records, list(shards.keys()))
+
+            return records
+
+        raise RuntimeError(f"Learning data in {self.directory} kept changing while it was read")
+
+    def _compact(self, generation: int, records: list, shard_names: list):
+        """
+            Replace the compacted file by the given records, then remove the merged shards. Skipped if another
+            process compacts at the same time or compacted since the records were read.
+        @param generation: Generation of the compacted file that the records were read from
+        @param records: All records that were read
+        @param shard_names: Shards that are merged
+        """
+        lock_path = self.directory.joinpath(LOCK_FILE)
+        if not self._acquire(lock_path):
+            return
+
+        try:
+            compacted = self._read_compacted()
+            if compacted["generation"] != generation:
+                return
+
+            # shards of an earlier compaction that crashed before removing them
+            for name in compacted["merged"]:
+                self.directory.joinpath(name).unlink(missing_ok=True)
+
+            content = {"generation": generation + 1, "records": records, "merged": shard_names}
+            replace_file(self.directory.joinpath(COMPACTED_FILE), lambda f: pickle.dump(content, f))
+
+            for name in shard_names:
+                self.directory.joinpath(name).unlink(missing_ok=True)
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def _acquire(self, lock_path: Path) -> bool:
+        """
+            Create the lock file, removing it first if it was left behind
+        @param lock_path: Path of the lock file
+        @return: Whether the lock was acquired
+        """
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime < LOCK_TIMEOUT_S:
+                        return False
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+
+        return False
+
+    def _shard_names(self) -> list:
+        return sorted(path.name for path in self.directory.glob(f"*{SHARD_SUFFIX}") if not path.name.startswith("."))
+
+    def _read_compacted(self) -> dict:
+        try:
+            compacted = self._read(COMPACTED_FILE)
+        except FileNotFoundError:
+            return {"generation": 0, "records": [], "merged": []}
+
+        compacted["merged"] = set(compacted["merged"])
+
+        return compacted
+
+    def _read(self, name: str):
+        with open(self.directory.joinpath(name), "rb") as f:
+            return pickle.load(f)
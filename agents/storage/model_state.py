@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from geniusweb.issuevalue.Domain import Domain
+
+from agents.bidspace.fingerprint import domain_fingerprint
+from agents.storage.files import replace_file
+
+"""
+    Learned opponent model state, stored per opponent and domain as a small NumPy archive:
+
+        {storage_dir}/{other}_<domain fingerprint>.model.npz
+
+    The archive holds the issue weights in the sorted issue order of BidCodec, the value counts of all issues in the
+    flat value layout of BidCodec and the number of offers they were learned from. A file is replaced atomically, so
+    sessions that end at the same time leave the state of one of them.
+"""
+
+
+def model_state_path(storage_dir: str, other: str, domain: Domain) -> Path:
+    """
+        Path of the stored opponent model state
+    @param storage_dir: Storage directory of the agent
+    @param other: Name of the opponent
+    @param domain: Domain of the session
+    @return: Path of the archive
+    """
+    return Path(storage_dir, f"{other}_{domain_fingerprint(domain)[:16]}.model.npz")
+
+
+def save_model_state(storage_dir: str, other: str, domain: Domain, weights: np.ndarray, counts: np.ndarray,
+                     offers: int):
+    """
+        Store the state of an opponent model
+    @param storage_dir: Storage directory of the agent
+    @param other: Name of the opponent
+    @param domain: Domain of the session
+    @param weights: Issue weights
+    @param counts: Value counts
+    @param offers: Number of offers the counts were learned from
+    """
+    path = model_state_path(storage_dir, other, domain)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    replace_file(path, lambda f: np.savez(f, weights=np.asarray(weights, dtype=np.float64),
+                                          counts=np.asarray(counts, dtype=np.float32),
+                                          offers=np.int64(offers)))
+
+
+def load_model_state(storage_dir: str, other: str, domain: Domain) -> Optional[tuple]:
+    """
+        Read the stored state of an opponent model
+    @param storage_dir: Storage directory of the agent
+    @param other: Name of the opponent
+    @param domain: Domain of the session
+    @return: Issue weights, value counts and number of offers, None if no state is stored
+    """
+    path = model_state_path(storage_dir, other, domain)
+    if not path.exists():
+        return None
+
+    with np.load(path, allow_pickle=False) as state:
+        return state["weights"], state["counts"].astype(np.float64), int(state["offers"])
@@ -6,9 +6,9 @@ class AcceptanceStrategy:
         Acceptance Strategy
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
 
@@ -6,11 +6,11 @@ class BiddingStrategy:
         Bidding Strategy
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
     my_offers: list                         # Generated offers
     received_offers: list                   # Received offers
 
-    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.profile = profile
         self.progress = progress
         self.my_offers = []
@@ -10,12 +10,12 @@ class OpponentModel:
         Opponent Model
     """
     profile: LinearAdditiveUtilitySpace
-    progress: ProgressTime
+    progress: SessionProgress
     offers: list    # Received bids
     domain: Domain  # Agent's domain
     issues: dict    # Issues
 
-    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: ProgressTime, **kwargs):
+    def __init__(self, domain: Domain, profile: LinearAdditiveUtilitySpace, progress: SessionProgress, **kwargs):
         self.domain = domain
         self.profile = profile
         self.progress = progress
@@ -9,7 +9,6 @@ from geniusweb.actions.Action import Action
 from geniusweb.actions.LearningDone import LearningDone
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -43,7 +42,7 @@ class TemplateAgent(DefaultParty):
         self.domain: Domain = None
         self.parameters: Parameters = None
         self.profile: LinearAdditiveUtilitySpace = None
-        self.progress: ProgressTime = None
+        self.progress: SessionProgress = None
         self.me: PartyId = None
         self.other: str = None
         self.settings: Settings = None
@@ -73,7 +72,7 @@ class TemplateAgent(DefaultParty):
             self.me = self.settings.getID()
 
             # progress towards the deadline has to be tracked manually through the use of the Progress object
-            self.progress = self.settings.getProgress()
+            self.progress = SessionProgress(self.settings.getProgress())
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
@@ -117,6 +116,8 @@ class TemplateAgent(DefaultParty):
         elif isinstance(data, YourTurn):
             # execute a turn
             self.take_action()
+            # a round has passed in round-based sessions
+            self.progress.advance()
 
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(data, Finished):
@@ -1,17 +1,20 @@
-import math
-
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.progress.ProgressTime import ProgressTime
 from time import time
 
+from agents.bidspace.bid_space import BidSpace
+from agents.bidspace.progress import SessionProgress
+from agents.bidspace.stats import get_profile_stats
+
 """
     Some useful functions
 """
 
+BID_SPACE_CACHE_SIZE = 4    # Profiles whose bid space is kept, the oldest is dropped first
+_bid_spaces = {}            # id(profile) -> (profile, bid space); the profile is kept so the id is not reused
+
 
 def get_utility(profile: LinearAdditiveUtilitySpace, bid: Bid) -> float:
     """
@@ -23,6 +26,24 @@ def get_utility(profile: LinearAdditiveUtilitySpace, bid: Bid) -> float:
     return float(profile.getUtility(bid))
 
 
+def get_bid_space(profile: LinearAdditiveUtilitySpace) -> BidSpace:
+    """
+        Bid space of the profile, built on the first call and shared by the later calls with the same profile
+    @param profile: Profile
+    @return: Bid space
+    """
+    cached = _bid_spaces.get(id(profile))
+
+    if cached is None or cached[0] is not profile:
+        if len(_bid_spaces) >= BID_SPACE_CACHE_SIZE:
+            del _bid_spaces[next(iter(_bid_spaces))]
+
+        cached = (profile, BidSpace(profile))
+        _bid_spaces[id(profile)] = cached
+
+    return cached[1]
+
+
 def get_bid_at(profile: LinearAdditiveUtilitySpace, utility: float) -> Bid:
     """
         Get the closest bid to desired utility
@@ -30,16 +51,9 @@ def get_bid_at(profile: LinearAdditiveUtilitySpace, utility: float) -> Bid:
     @param utility: Desired Utility
     @return: The closest bid to desired utility
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    closest = all_bids.get(0)
-
-    for i in range(all_bids.size()):
-        if abs(utility - get_utility(profile, all_bids.get(i))) < abs(utility - get_utility(profile, closest)):
-            closest = all_bids.get(i)
+    bid_space = get_bid_space(profile)
 
-    return closest
+    return bid_space.get(bid_space.get_closest_index(utility))
 
 
 def get_bids_at(profile: LinearAdditiveUtilitySpace, utility: float, lower_bound: float = 0.02,
@@ -52,16 +66,9 @@ def get_bids_at(profile: LinearAdditiveUtilitySpace, utility: float, lower_bound
     @param upper_bound: Upper bound of the Range
     @return: List of bids in that range
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    bids = []
-
-    for i in range(1, all_bids.size()):
-        if utility - lower_bound <= get_utility(profile, all_bids.get(i)) <= utility + upper_bound:
-            bids.append(all_bids.get(i))
+    bid_space = get_bid_space(profile)
 
-    return bids
+    return [bid_space.get(i) for i in bid_space.get_indices_at(utility, lower_bound, upper_bound)]
 
 
 def get_min_max_utility(profile: LinearAdditiveUtilitySpace) -> (float, float):
@@ -70,17 +77,9 @@ def get_min_max_utility(profile: LinearAdditiveUtilitySpace) -> (float, float):
     @param profile: Profile
     @return: Minimum and maximum utility as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
+    stats = get_profile_stats(profile)
 
-    min_utility = 1.0
-    max_utility = 0.0
-
-    for i in range(all_bids.size()):
-        min_utility = min(get_utility(profile, all_bids.get(i)), min_utility)
-        max_utility = max(get_utility(profile, all_bids.get(i)), max_utility)
-
-    return min_utility, max_utility
+    return stats.min, stats.max
 
 
 def get_mean_stdev(profile: LinearAdditiveUtilitySpace) -> (float, float):
@@ -89,22 +88,15 @@ def get_mean_stdev(profile: LinearAdditiveUtilitySpace) -> (float, float):
     @param profile: Profile
     @return: Mean and standard derivation values as float
     """
-    domain = profile.getDomain()
-    all_bids = AllBidsList(domain)
-
-    utilities = [get_utility(profile, all_bids.get(i)) for i in range(all_bids.size())]
-
-    mean = sum(utilities) / len(utilities)
-
-    stdev = math.sqrt(sum([math.pow(utility - mean, 2.) for utility in utilities]) / len(utilities))
+    stats = get_profile_stats(profile)
 
-    return mean, stdev
+    return stats.mean, stats.stdev
 
 
-def get_time(progress: ProgressTime) -> float:
+def get_time(progress: SessionProgress) -> float:
     """
         Get current time. Initially, it is 0; and it is 1 at the end of the negotiation.
-    @param progress: ProgressTime object to calculate t
+    @param progress: SessionProgress object to calculate t
     @return: Current time as float in range [0, 1]
     """
     return progress.get(int(time() * 1000))
@@ -5,9 +5,13 @@ from geniusweb.issuevalue.Bid import Bid
 from geniusweb.issuevalue.Value import Value
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
+from collections import OrderedDict
 from decimal import Decimal
+from threading import Lock
 from typing import List
 
+from agents.bidspace.fingerprint import profile_fingerprint
+
 
 class ExtendedUtilSpace:
     """
@@ -77,3 +81,63 @@ class ExtendedUtilSpace:
         return self._bidutils.getBids(
             Interval(utilityGoal - self._tolerance, utilityGoal)
         )
+
+
+class ExtendedUtilSpaceCache:
+    """
+    Process-wide LRU cache of {@link ExtendedUtilSpace}, keyed by the content
+    fingerprint of the profile. Sessions in the same interpreter that use the
+    same profile reuse the expensive {@link BidsWithUtility} structure instead
+    of rebuilding it.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self._maxsize = maxsize
+        self._spaces: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, space: LinearAdditive) -> ExtendedUtilSpace:
+        """
+        @param space the profile
+        @return the cached ExtendedUtilSpace of a profile with the same
+                content, or a new one that is added to the cache.
+        """
+        key = profile_fingerprint(space)
+        with self._lock:
+            if key in self._spaces:
+                self.hits += 1
+                self._spaces.move_to_end(key)
+                return self._spaces[key]
+            self.misses += 1
+
+        # built outside the lock, a concurrent miss only builds it twice
+        extendedspace = ExtendedUtilSpace(space)
+        with self._lock:
+            self._spaces[key] = extendedspace
+            self._spaces.move_to_end(key)
+            while len(self._spaces) > self._maxsize:
+                self._spaces.popitem(last=False)
+        return extendedspace
+
+    def info(self) -> dict:
+        """
+        @return hits, misses, current size and maximum size of the cache
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._spaces),
+                "maxsize": self._maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._spaces.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+EXTENDED_UTIL_SPACE_CACHE = ExtendedUtilSpaceCache()
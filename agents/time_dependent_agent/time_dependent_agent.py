@@ -37,7 +37,10 @@ from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from time import sleep, time as clock
 from decimal import Decimal
 import sys
-from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from agents.time_dependent_agent.extended_util_space import (
+    EXTENDED_UTIL_SPACE_CACHE,
+    ExtendedUtilSpace,
+)
 from tudelft_utilities_logging.Reporter import Reporter
 
 
@@ -224,7 +227,7 @@ class TimeDependentAgent(DefaultParty):
         newutilspace = self._profileint.getProfile()
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            self._extendedspace = EXTENDED_UTIL_SPACE_CACHE.get(self._utilspace)
         return self._utilspace
 
     def _makeBid(self) -> Bid:
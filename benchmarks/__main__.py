@@ -0,0 +1,85 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.hot_paths import CASES, compare_to_baseline, run_benchmarks
+
+"""
+    Benchmark the hot paths of the agents on the shipped domains:
+
+        python -m benchmarks --save-baseline       # record benchmarks/baseline.json on this machine, run this first
+        python -m benchmarks                       # all domains, compared to benchmarks/baseline.json
+        python -m benchmarks --domains domain00 domain01 --cases hybrid.get_bids_at
+
+    The report is written as CSV and JSON to the results directory. The exit status is 1 if a case regressed.
+"""
+
+DOMAINS_DIR = Path("domains")
+BASELINE_FILE = Path("benchmarks", "baseline.json")
+
+
+def write_csv(rows: list, path: Path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(rows: list, path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(rows, indent=2))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the hot paths of the agents")
+    parser.add_argument("--domains", nargs="*", help="domain directories in domains/, all of them by default")
+    parser.add_argument("--cases", nargs="*", choices=[case.name for case in CASES], help="cases to run, all by default")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs of each case")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs of each case")
+    parser.add_argument("--results-dir", type=Path, default=Path("results", f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="results of an earlier run to compare to")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    if args.domains:
+        domain_dirs = [DOMAINS_DIR.joinpath(name) for name in args.domains]
+    else:
+        domain_dirs = sorted(path for path in DOMAINS_DIR.glob("domain*") if path.is_dir())
+    cases = [case for case in CASES if case.name in args.cases] if args.cases else CASES
+
+    rows = run_benchmarks(domain_dirs, cases, args.warmup, args.repeat)
+
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    write_csv(rows, args.results_dir.joinpath("benchmark.csv"))
+    write_json(rows, args.results_dir.joinpath("benchmark.json"))
+    print(f"Benchmark results written to {args.results_dir}")
+
+    regressions = []
+    if args.baseline.exists():
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            comparison = compare_to_baseline(rows, json.load(f), args.threshold)
+
+        if len(comparison) > 0:
+            write_csv(comparison, args.results_dir.joinpath("comparison.csv"))
+            regressions = [row for row in comparison if row["regression"]]
+
+        for row in regressions:
+            print(f"REGRESSION {row['case']} on {row['domain']} (size {row['size']}, {row['issues']} issues): "
+                  f"{row['baseline_ms']:.3f} ms -> {row['median_ms']:.3f} ms ({row['ratio']:.2f}x)")
+        print(f"{len(regressions)} of {len(comparison)} cases regressed compared to {args.baseline}")
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}, nothing compared. Run with --save-baseline to record one.")
+
+    if args.save_baseline:
+        write_json(rows, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import math
+import statistics
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, NamedTuple
+
+from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
+    LinearAdditiveUtilitySpace,
+)
+from geniusweb.progress.ProgressTime import ProgressTime
+
+import agents.group4.opponent_model as group4_opponent_model
+import agents.group4.utils as group4_utils
+import agents.hybrid.opponent_model as hybrid_opponent_model
+import agents.hybrid.utils as hybrid_utils
+import agents.template_agent.utils as template_utils
+from agents.bidspace.progress import SessionProgress
+from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from utils.runners import get_utility_function
+
+"""
+    Benchmarks of the hot paths of the agents. Every case is set up once per domain, run a few times to warm up and
+    then timed over a number of repetitions. Times are reported per call in ms.
+"""
+
+OPPONENT_OFFERS = 50        # Offers that an opponent model receives before it is timed
+
+
+class Domain(NamedTuple):
+    name: str                               # Name of the domain directory
+    profile: LinearAdditiveUtilitySpace     # Own profile (profileA)
+    offers: list                            # Bids of the opponent (profileB), conceding from its best bid
+    size: int                               # Number of bids
+    issues: int                             # Number of issues
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable     # setup(domain) -> function that makes `number` calls
+    number: Callable    # number(domain) -> number of calls of one run
+
+
+def load_domain(domain_dir: Path) -> Domain:
+    """
+        Load the profiles of a domain directory
+    @param domain_dir: Directory with profileA.json and profileB.json
+    @return: Domain to benchmark
+    """
+    profile = get_utility_function(f"file:{domain_dir.joinpath('profileA.json')}")
+    opponent_profile = get_utility_function(f"file:{domain_dir.joinpath('profileB.json')}")
+
+    opponent_space = hybrid_utils.SortedBidSpace(opponent_profile)
+    offers = [opponent_space.get(index) for index in opponent_space.order[::-1][:OPPONENT_OFFERS]]
+
+    issues_values = profile.getDomain().getIssuesValues()
+    size = math.prod(values.size() for values in issues_values.values())
+
+    return Domain(domain_dir.name, profile, offers, size, len(issues_values))
+
+
+def new_progress(deadline_ms: int = 10000) -> SessionProgress:
+    """
+        Progress of a session that starts now
+    @param deadline_ms: Duration of the session in ms
+    @return: Progress
+    """
+    return SessionProgress(ProgressTime(deadline_ms, datetime.now()))
+
+
+def middle_utility(profile: LinearAdditiveUtilitySpace) -> float:
+    """
+        Utility halfway between the minimum and maximum utility of the profile
+    @param profile: Profile
+    @return: Utility
+    """
+    min_utility, max_utility = hybrid_utils.get_min_max_utility(hybrid_utils.SortedBidSpace(profile))
+
+    return (min_utility + max_utility) / 2.
+
+
+def setup_group4_bid_space(domain: Domain) -> Callable:
+    return lambda: group4_utils.BidSpace(domain.profile)
+
+
+def setup_group4_get_bid_greater_than(domain: Domain) -> Callable:
+    bid_space = group4_utils.BidSpace(domain.profile)
+    opponent_model = group4_opponent_model.OpponentModel(domain.profile.getDomain(), domain.profile, new_progress())
+    for bid in domain.offers:
+        opponent_model.update(bid)
+    utility = middle_utility(domain.profile)
+
+    return lambda: group4_utils.get_bid_greater_than(bid_space, utility, opponent_model, {})
+
+
+def setup_hybrid_get_bids_at(domain: Domain) -> Callable:
+    bid_space = hybrid_utils.SortedBidSpace(domain.profile)
+    utility = middle_utility(domain.profile)
+
+    return lambda: hybrid_utils.get_bids_at(bid_space, utility)
+
+
+def setup_hybrid_get_min_max_utility(domain: Domain) -> Callable:
+    bid_space = hybrid_utils.SortedBidSpace(domain.profile)
+
+    return lambda: hybrid_utils.get_min_max_utility(bid_space)
+
+
+def setup_template_get_bids_at(domain: Domain) -> Callable:
+    utility = middle_utility(domain.profile)
+
+    return lambda: template_utils.get_bids_at(domain.profile, utility)
+
+
+def setup_template_get_min_max_utility(domain: Domain) -> Callable:
+    return lambda: template_utils.get_min_max_utility(domain.profile)
+
+
+def new_opponent_model(module, domain: Domain):
+    return module.OpponentModel(domain.profile.getDomain(), domain.profile, new_progress(), log=lambda message: None)
+
+
+def setup_opponent_model_update(module) -> Callable:
+    def setup(domain: Domain) -> Callable:
+        def run():
+            # a fresh model per run, so every run times the same sequence of updates
+            opponent_model = new_opponent_model(module, domain)
+            for bid in domain.offers:
+                opponent_model.update(bid)
+
+        return run
+
+    return setup
+
+
+def setup_opponent_model_get_utility(module) -> Callable:
+    def setup(domain: Domain) -> Callable:
+        opponent_model = new_opponent_model(module, domain)
+        for bid in domain.offers:
+            opponent_model.update(bid)
+
+        def run():
+            for bid in domain.offers:
+                opponent_model.get_utility(bid)
+
+        return run
+
+    return setup
+
+
+def setup_extended_util_space(domain: Domain) -> Callable:
+    return lambda: ExtendedUtilSpace(domain.profile)
+
+
+def once(domain: Domain) -> int:
+    return 1
+
+
+def per_offer(domain: Domain) -> int:
+    return len(domain.offers)
+
+
+CASES = [
+    Case("group4.BidSpace", setup_group4_bid_space, once),
+    Case("group4.get_bid_greater_than", setup_group4_get_bid_greater_than, once),
+    Case("hybrid.get_bids_at", setup_hybrid_get_bids_at, once),
+    Case("hybrid.get_min_max_utility", setup_hybrid_get_min_max_utility, once),
+    Case("template_agent.get_bids_at", setup_template_get_bids_at, once),
+    Case("template_agent.get_min_max_utility", setup_template_get_min_max_utility, once),
+    Case("group4.OpponentModel.update", setup_opponent_model_update(group4_opponent_model), per_offer),
+    Case("group4.OpponentModel.get_utility", setup_opponent_model_get_utility(group4_opponent_model), per_offer),
+    Case("hybrid.OpponentModel.update", setup_opponent_model_update(hybrid_opponent_model), per_offer),
+    Case("hybrid.OpponentModel.get_utility", setup_opponent_model_get_utility(hybrid_opponent_model), per_offer),
+    Case("ExtendedUtilSpace", setup_extended_util_space, once),
+]
+
+
+def time_function(function: Callable, number: int, warmup: int, repeat: int) -> list:
+    """
+        Time a function after warming it up
+    @param function: Function that makes `number` calls
+    @param number: Number of calls of one run
+    @param warmup: Number of untimed runs
+    @param repeat: Number of timed runs
+    @return: Time per call of every timed run in ms
+    """
+    for _ in range(warmup):
+        function()
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append((perf_counter() - start) * 1000. / number)
+
+    return times
+
+
+def run_benchmarks(domain_dirs: list, cases: list = None, warmup: int = 2, repeat: int = 10) -> list:
+    """
+        Benchmark the cases on every domain
+    @param domain_dirs: Domain directories
+    @param cases: Cases to run, all cases if None
+    @param warmup: Number of untimed runs of each case
+    @param repeat: Number of timed runs of each case
+    @return: One row per domain and case, ordered by domain size and issue count
+    """
+    cases = cases if cases is not None else CASES
+    rows = []
+
+    for domain_dir in domain_dirs:
+        domain = load_domain(Path(domain_dir))
+
+        for case in cases:
+            number = case.number(domain)
+            times = time_function(case.setup(domain), number, warmup, repeat)
+
+            rows.append({
+                "domain": domain.name,
+                "size": domain.size,
+                "issues": domain.issues,
+                "case": case.name,
+                "number": number,
+                "repeat": repeat,
+                "min_ms": min(times),
+                "median_ms": statistics.median(times),
+                "mean_ms": statistics.mean(times),
+            })
+
+    case_order = {case.name: i for i, case in enumerate(cases)}
+    rows.sort(key=lambda row: (row["size"], row["issues"], row["domain"], case_order[row["case"]]))
+
+    return rows
+
+
+def compare_to_baseline(rows: list, baseline: list, threshold: float = 1.25) -> list:
+    """
+        Compare the median times with a baseline run
+    @param rows: Rows of run_benchmarks
+    @param baseline: Rows of an earlier run
+    @param threshold: Ratio of the median times above which a case has regressed
+    @return: One row per domain and case that is in both runs
+    """
+    baseline_times = {(row["domain"], row["case"]): row["median_ms"] for row in baseline}
+    comparison = []
+
+    for row in rows:
+        baseline_ms = baseline_times.get((row["domain"], row["case"]))
+        if baseline_ms is None:
+            continue
+
+        ratio = row["median_ms"] / baseline_ms if baseline_ms > 0 else math.inf
+        comparison.append({
+            "domain": row["domain"],
+            "size": row["size"],
+            "issues": row["issues"],
+            "case": row["case"],
+            "baseline_ms": baseline_ms,
+            "median_ms": row["median_ms"],
+            "ratio": ratio,
+            "regression": ratio > threshold,
+        })
+
+    return comparison
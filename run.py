@@ -3,6 +3,7 @@ import os
 import time
 from pathlib import Path
 
+from utils.compact_trace import write_compact_trace
 from utils.plot_trace import plot_trace
 from utils.runners import run_session
 
@@ -11,6 +12,13 @@ RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
 # Reset Stored Data. If you want to use previous stored data, make it false. If you want to clean stored data, make it true.
 RESET_STORAGE = False
 
+# Plot long traces with WebGL, downsampled to about this many points per line. None plots every offer.
+PLOT_MAX_POINTS = None
+
+# Write the trace as compact session_results_trace.npz instead of indented JSON. Read it back with
+# utils.compact_trace.read_compact_trace, which returns the same dictionary.
+COMPACT_TRACE = False
+
 # create results directory if it does not exist
 if not RESULTS_DIR.exists():
     os.makedirs(RESULTS_DIR)
@@ -19,6 +27,8 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement
+#   Optionally, "simulated_action_ms" runs the session on a simulated clock on which every action costs that many ms.
+#   The deadline is then reached after a fixed number of rounds, no matter how fast the machine is.
 settings = {
     "agents": [
         {
@@ -48,10 +58,13 @@ session_results_trace, session_results_summary = run_session(settings, RESET_STO
 
 # plot trace to html file
 if not session_results_trace["error"]:
-    plot_trace(session_results_trace, RESULTS_DIR.joinpath("trace_plot.html"))
+    plot_trace(session_results_trace, RESULTS_DIR.joinpath("trace_plot.html"), PLOT_MAX_POINTS)
 
 # write results to file
-with open(RESULTS_DIR.joinpath("session_results_trace.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(session_results_trace, indent=2))
+if COMPACT_TRACE:
+    write_compact_trace(session_results_trace, RESULTS_DIR.joinpath("session_results_trace.npz"))
+else:
+    with open(RESULTS_DIR.joinpath("session_results_trace.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(session_results_trace, indent=2))
 with open(RESULTS_DIR.joinpath("session_results_summary.json"), "w", encoding="utf-8") as f:
     f.write(json.dumps(session_results_summary, indent=2))
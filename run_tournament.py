@@ -6,7 +6,11 @@ import time
 
 from utils.runners import run_tournament
 
-RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+# Resume an interrupted tournament by setting this to its results directory, e.g. Path("results", "20220101-120000").
+# Sessions in its checkpoint are not run again and the agent storage is kept.
+RESUME_DIR = None
+
+RESULTS_DIR = RESUME_DIR if RESUME_DIR is not None else Path("results", time.strftime('%Y%m%d-%H%M%S'))
 
 # create results directory if it does not exist
 if not RESULTS_DIR.exists():
@@ -15,13 +19,19 @@ if not RESULTS_DIR.exists():
 # Reset storage
 STORAGE_DIR = Path("agent_storage/")
 
-if STORAGE_DIR.exists():
+if STORAGE_DIR.exists() and RESUME_DIR is None:
     shutil.rmtree(STORAGE_DIR)
 
+# Number of sessions that run in parallel. With more than one worker, every session gets its own copy of the agent
+# storage, so agents do not learn from sessions of the same tournament.
+WORKERS = 1
+
 # Settings to run a negotiation session:
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+#   Optionally, "simulated_action_ms" runs the session on a simulated clock on which every action costs that many ms.
+#   The deadline is then reached after a fixed number of rounds, no matter how fast the machine is.
 tournament_settings = {
     "agents": [
         {
@@ -60,7 +70,12 @@ tournament_settings = {
 }
 
 # run a session and obtain results in dictionaries
-tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
+tournament_steps, tournament_results, tournament_results_summary = run_tournament(
+    tournament_settings,
+    WORKERS,
+    checkpoint_path=RESULTS_DIR.joinpath("tournament_checkpoint.jsonl"),
+    resume=RESUME_DIR is not None,
+)
 
 # save the tournament settings for reference
 with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
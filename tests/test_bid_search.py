@@ -0,0 +1,107 @@
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from geniusweb.issuevalue.DiscreteValue import DiscreteValue
+from geniusweb.issuevalue.DiscreteValueSet import DiscreteValueSet
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.profile.utilityspace.DiscreteValueSetUtilities import DiscreteValueSetUtilities
+from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import LinearAdditiveUtilitySpace
+
+from agents.bidspace.bid_codec import BidCodec
+from agents.bidspace.bid_search import BidSearch
+
+"""
+    Branch-and-bound bid search against brute force over the utility table of small random profiles.
+"""
+
+
+def random_profile(rng: random.Random, radices: list) -> LinearAdditiveUtilitySpace:
+    issues = {f"issue{k}": [f"value{j}" for j in range(radix)] for k, radix in enumerate(radices)}
+    domain = Domain("random", {issue: DiscreteValueSet([DiscreteValue(value) for value in values])
+                               for issue, values in issues.items()})
+
+    utilities = {issue: DiscreteValueSetUtilities({DiscreteValue(value): Decimal(str(round(rng.random(), 6)))
+                                                   for value in values})
+                 for issue, values in issues.items()}
+    weights = [rng.random() for _ in issues]
+    weights = {issue: Decimal(str(round(weight / sum(weights), 6))) for issue, weight in zip(issues, weights)}
+
+    return LinearAdditiveUtilitySpace(domain, "random", utilities, weights)
+
+
+def random_search(seed: int, radices: list) -> (BidSearch, np.ndarray, list):
+    rng = random.Random(seed)
+    profile = random_profile(rng, radices)
+    search = BidSearch(profile, BidCodec(profile.getDomain(), canonical=True))
+
+    np_rng = np.random.default_rng(seed)
+    opponent_utilities = [np_rng.random(radix) for radix in search.codec.radices]
+
+    return search, search.tabulate(), opponent_utilities
+
+
+def opponent_table(search: BidSearch, opponent_utilities: list) -> np.ndarray:
+    digits = search.codec.digits_of(np.arange(search.codec.size))
+
+    return sum(utilities[digits[:, k]] for k, utilities in enumerate(opponent_utilities))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_search_top_k_and_best_match_brute_force(seed):
+    search, table, opponent_utilities = random_search(seed, [3, 4, 2, 5])
+    opponent = opponent_table(search, opponent_utilities)
+
+    for min_utility in np.linspace(table.min(), table.max(), 7):
+        excluded = set(np.flatnonzero(table >= min_utility)[::3].tolist())
+        eligible = [i for i in np.flatnonzero(table >= min_utility) if i not in excluded]
+        expected = sorted(eligible, key=lambda i: -opponent[i])
+
+        top_k = search.search_top_k(min_utility, opponent_utilities, 5, excluded)
+        assert np.allclose(opponent[top_k], opponent[expected[:5]])
+
+        best = search.search_best(min_utility, opponent_utilities, excluded)
+        if len(expected) == 0:
+            assert best is None
+        else:
+            assert opponent[best] == pytest.approx(opponent[expected[0]])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_search_range_and_closest_match_brute_force(seed):
+    search, table, _ = random_search(seed, [3, 4, 2, 5])
+
+    for utility in np.linspace(table.min() - .1, table.max() + .1, 11):
+        expected = np.flatnonzero((table >= utility - .05) & (table <= utility + .05))
+        assert sorted(search.search_range(utility - .05, utility + .05).tolist()) == expected.tolist()
+
+        closest = search.search_closest(utility)
+        assert abs(table[closest] - utility) == pytest.approx(np.min(np.abs(table - utility)))
+
+
+def test_budgeted_queries_return_valid_bids():
+    search, table, opponent_utilities = random_search(0, [6] * 6)
+    opponent = opponent_table(search, opponent_utilities)
+    utility = float(np.median(table))
+
+    # the smallest budget still reaches one bid
+    closest = search.search_closest(utility, tolerance=0., max_nodes=0)
+    assert 0 <= closest < search.codec.size
+
+    in_range = search.search_range(utility - .1, utility + .1, max_nodes=search.path_nodes * 4)
+    exact = np.flatnonzero((table >= utility - .1) & (table <= utility + .1))
+    assert 0 < len(in_range) < len(exact)
+    assert set(in_range.tolist()) <= set(exact.tolist())
+
+    # a limit bounds the search, not only the output
+    limited = search.search_range(0., 1., limit=3)
+    assert len(limited) == 3 and np.all((table[limited] >= 0.) & (table[limited] <= 1.))
+
+    top_k = search.search_top_k(utility, opponent_utilities, 10, max_nodes=search.path_nodes)
+    assert 0 < len(top_k) <= 10
+    assert np.all(table[top_k] >= utility - 1e-12)
+    assert np.all(np.diff(opponent[top_k]) <= 0)
@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from numpy.linalg import inv
+
+from agents.bidspace.progress import SessionProgress
+from agents.hybrid.learning_model import LearningModel
+from agents.hybrid.opponent_model import OpponentModel
+from agents.storage.learning_store import LearningStore
+from utils.runners import get_utility_function
+
+"""
+    The concession curve saved by the hybrid LearningModel against the least-squares fit it replaced, on a recorded
+    session. The fixture holds the time of each offer of the opponent and the offered bid as its index in the
+    canonical BidCodec layout of the domain.
+"""
+
+ROOT = Path(__file__).resolve().parent.parent
+SESSION = Path(__file__).resolve().parent.joinpath("fixtures", "hybrid_session_domain00.json")
+
+
+class RecordedProgress:
+    """
+        Progress that is set by the test instead of following the clock
+    """
+    time: float
+
+    def __init__(self):
+        self.time = 0.
+
+    def get(self, current_time: int) -> float:
+        return self.time
+
+
+def baseline_fit(times: list, utilities: list) -> (float, float, float):
+    """
+        Concession curve as it was fitted from all received bids with the final opponent model
+    @param times: Time of each received bid
+    @param utilities: Opponent utility of each received bid
+    @return: p0, p1 and p2
+    """
+    p0 = max(utilities)
+    p2 = min(utilities)
+
+    def target_fn(t, utility):
+        return (utility - (1 - t) * (1 - t) * p0 - t * t * p2) / (2. * (1 - t))
+
+    target = [target_fn(times[i], utilities[i]) for i in range(len(utilities))]
+
+    X = np.reshape(np.array(times, dtype=np.float32), (len(times), 1))
+    Y = np.reshape(np.array(target, dtype=np.float32), (len(target), 1))
+
+    p1 = float(inv((X.transpose().dot(X))).dot(X.transpose().dot(Y))[0, 0])
+
+    return p0, p1, p2
+
+
+def test_save_data_matches_baseline_fit(tmp_path):
+    with open(SESSION) as f:
+        session = json.load(f)
+
+    profile = get_utility_function(f"file:{ROOT.joinpath(session['domain'], 'profileA.json')}")
+    recorded = RecordedProgress()
+    progress = SessionProgress(recorded)
+
+    opponent_model = OpponentModel(profile.getDomain(), profile, progress, log=lambda *args: None)
+    learning_model = LearningModel(profile, progress, opponent_model=opponent_model)
+
+    for time, index in zip(session["times"], session["bids"]):
+        recorded.time = time
+        bid = opponent_model.codec.decode(index)
+
+        opponent_model.update(bid)
+        learning_model.receive_bid(bid)
+
+    learning_model.save_data(str(tmp_path), "opponent")
+    record = LearningStore(str(tmp_path), "opponent").load()[-1]
+
+    utilities = [opponent_model.get_utility(opponent_model.codec.decode(index)) for index in session["bids"]]
+    p0, p1, p2 = baseline_fit(session["times"], utilities)
+
+    # The issue weights move during the session, so the extremes under the final model are not those seen online
+    assert record["p0"] == pytest.approx(p0, abs=1e-12)
+    assert record["p2"] == pytest.approx(p2, abs=1e-12)
+    # The baseline is solved in float32
+    assert record["p1"] == pytest.approx(p1, rel=1e-4, abs=1e-5)
+    assert record["domain_size"] == opponent_model.codec.size
@@ -0,0 +1,56 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import agents.storage.learning_store as learning_store
+from agents.storage.learning_store import COMPACTED_FILE, SHARD_SUFFIX, LearningStore
+
+"""
+    Learning data that several processes append to and load at the same time.
+"""
+
+WRITERS = 6
+RECORDS = 40
+
+
+def write_records(storage_dir: str, writer: int) -> int:
+    # compact often, so that loads race with compactions of the other writers
+    learning_store.COMPACT_SHARDS = 3
+
+    store = LearningStore(storage_dir, "opponent")
+    for i in range(RECORDS):
+        store.append((writer, i))
+        store.load()
+
+    return writer
+
+
+def test_concurrent_writers_keep_every_record_once(tmp_path):
+    with ProcessPoolExecutor(max_workers=WRITERS) as executor:
+        list(executor.map(write_records, [str(tmp_path)] * WRITERS, range(WRITERS)))
+
+    store = LearningStore(str(tmp_path), "opponent")
+    records = store.load()
+
+    assert sorted(records) == [(writer, i) for writer in range(WRITERS) for i in range(RECORDS)]
+    # the records of a writer are in the order it wrote them
+    for writer in range(WRITERS):
+        assert [i for w, i in records if w == writer] == list(range(RECORDS))
+
+    directory = tmp_path.joinpath("opponent_data")
+    assert directory.joinpath(COMPACTED_FILE).exists()
+    assert len(list(directory.glob(f"*{SHARD_SUFFIX}"))) < WRITERS * RECORDS
+
+
+def test_compaction_keeps_the_latest_records(tmp_path):
+    store = LearningStore(str(tmp_path), "opponent", limit=5)
+    for i in range(learning_store.COMPACT_SHARDS + 3):
+        store.append(i)
+
+    total = learning_store.COMPACT_SHARDS + 3
+    assert store.load() == list(range(total - 5, total))
+
+    # the shards were merged into the compacted file, and a later load reads the same records from it
+    assert list(tmp_path.joinpath("opponent_data").glob(f"*{SHARD_SUFFIX}")) == []
+    assert store.load() == list(range(total - 5, total))
+
+    store.append(total)
+    assert store.load() == list(range(total - 4, total + 1))
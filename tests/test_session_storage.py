@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from agents.storage.learning_store import LearningStore
+from utils.session_storage import SESSIONS_DIR, isolate_storage, merge_storage
+
+"""
+    Storage of sessions that run at the same time: each one writes to its own copy, which is merged back when it ends.
+"""
+
+
+def get_settings(storage_dir: Path) -> dict:
+    return {
+        "agents": [
+            {"class": "agents.hybrid.hybrid_agent.HybridAgent", "parameters": {"storage_dir": str(storage_dir)}},
+            {"class": "agents.boulware_agent.boulware_agent.BoulwareAgent"},
+        ],
+        "profiles": ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
+        "deadline_time_ms": 10000,
+    }
+
+
+def test_learned_data_is_merged_back(tmp_path):
+    storage_dir = tmp_path.joinpath("storage")
+    LearningStore(str(storage_dir), "opponent").append({"session": 0})
+
+    # both sessions start before either one ends
+    first = isolate_storage(get_settings(storage_dir), 1)
+    second = isolate_storage(get_settings(storage_dir), 2)
+
+    for session, settings in enumerate([first, second], start=1):
+        session_dir = settings["agents"][0]["parameters"]["storage_dir"]
+        assert LearningStore(session_dir, "opponent").load() == [{"session": 0}]
+
+        LearningStore(session_dir, "opponent").append({"session": session})
+        Path(session_dir, "opponent.model.npz").write_bytes(bytes([session]))
+
+    merge_storage(first)
+    merge_storage(second)
+
+    records = LearningStore(str(storage_dir), "opponent").load()
+    assert sorted(record["session"] for record in records) == [0, 1, 2]
+    assert storage_dir.joinpath("opponent.model.npz").read_bytes() == bytes([2])
+    assert not storage_dir.joinpath(SESSIONS_DIR).exists()
+
+    # a session that starts afterwards learns from both
+    third = isolate_storage(get_settings(storage_dir), 3)
+    assert len(LearningStore(third["agents"][0]["parameters"]["storage_dir"], "opponent").load()) == 3
+    merge_storage(third)
+    assert not storage_dir.joinpath(SESSIONS_DIR).exists()
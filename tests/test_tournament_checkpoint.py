@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+pytest.importorskip("geniusweb")
+
+import utils.runners as runners
+
+"""
+    Resuming a tournament from its checkpoint: sessions in the checkpoint are not run again.
+"""
+
+TOURNAMENT = {
+    "agents": [
+        {"class": "agents.boulware_agent.boulware_agent.BoulwareAgent"},
+        {"class": "agents.conceder_agent.conceder_agent.ConcederAgent"},
+    ],
+    "profile_sets": [
+        ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
+        ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
+    ],
+    "deadline_time_ms": 10000,
+}
+
+
+def get_summary(settings: dict, utility: float) -> dict:
+    return {
+        "agent_1": settings["agents"][0]["class"].split(".")[-1],
+        "agent_2": settings["agents"][1]["class"].split(".")[-1],
+        "utility_1": utility,
+        "utility_2": utility,
+        "nash_product": utility * utility,
+        "social_welfare": 2 * utility,
+        "result": "agreement",
+    }
+
+
+def get_steps() -> list:
+    # sessions of the tournament in the order in which run_tournament creates them
+    steps = []
+    for profiles in TOURNAMENT["profile_sets"]:
+        for agents in [TOURNAMENT["agents"], TOURNAMENT["agents"][::-1]]:
+            steps.append({"agents": list(agents), "profiles": profiles,
+                          "deadline_time_ms": TOURNAMENT["deadline_time_ms"]})
+
+    return steps
+
+
+def test_resume_runs_only_missing_sessions(tmp_path, monkeypatch):
+    steps = get_steps()
+    checkpoint_path = tmp_path.joinpath("checkpoint.jsonl")
+
+    # two sessions finished, a third one was cut off while its row was written
+    with open(checkpoint_path, "w", encoding="utf-8") as f:
+        for i in [0, 2]:
+            key = runners.get_session_key(steps[i], 0)
+            f.write(json.dumps({"key": key, "summary": get_summary(steps[i], .5)}) + "\n")
+        f.write(json.dumps({"key": runners.get_session_key(steps[1], 0), "summary": {}})[:25])
+
+    ran = []
+
+    def run_session_summary(settings: dict) -> dict:
+        ran.append(steps.index(settings))
+        return get_summary(settings, .8)
+
+    monkeypatch.setattr(runners, "run_session_summary", run_session_summary)
+
+    _, results, _ = runners.run_tournament(TOURNAMENT, checkpoint_path=checkpoint_path, resume=True)
+
+    assert ran == [1, 3]
+    assert [result["utility_1"] for result in results] == [.5, .8, .5, .8]
+
+    # the checkpoint now holds every session, after the line that was cut off
+    assert len(runners.load_checkpoint(checkpoint_path)) == len(steps)
+
+
+def test_resume_without_checkpoint_is_rejected():
+    with pytest.raises(ValueError):
+        runners.run_tournament(TOURNAMENT, resume=True)
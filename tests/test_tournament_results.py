@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from utils.runners import process_tournament_results
+
+"""
+    Aggregation of the session summaries of a tournament per agent.
+"""
+
+
+def get_summary(agents: tuple, result: str, utility: float, distance: float = None) -> dict:
+    summary = {
+        "agent_1": agents[0],
+        "agent_2": agents[1],
+        "utility_1": utility,
+        "utility_2": utility,
+        "nash_product": utility * utility,
+        "social_welfare": 2 * utility,
+        "result": result,
+    }
+    if distance is not None:
+        summary.update({"pareto_distance": distance, "nash_distance": distance, "kalai_distance": distance})
+
+    return summary
+
+
+def test_distances_are_averaged_over_agreements():
+    summary = process_tournament_results([
+        get_summary(("A", "B"), "agreement", .8, .1),
+        get_summary(("A", "B"), "agreement", .6, .3),
+        get_summary(("B", "A"), "failed", 0.),
+        get_summary(("A", "C"), "ERROR", 0.),
+        # summary of an older checkpoint, which had a distance for the disagreement point
+        get_summary(("C", "B"), "failed", 0., 1.2),
+    ])
+
+    assert summary.loc["A", "avg_pareto_distance"] == pytest.approx(.2)
+    assert summary.loc["A", "agreement"] == 2
+    assert summary.loc["A", "failed"] == 1
+    assert summary.loc["A", "ERROR"] == 1
+    assert summary.loc["A", "count"] == 4
+
+    # no agreement, so no average distance
+    assert math.isnan(summary.loc["C", "avg_kalai_distance"])
+    assert summary.loc["C", "agreement"] == 0
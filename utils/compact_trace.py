@@ -0,0 +1,143 @@
+import json
+import os
+
+import numpy as np
+
+"""
+    Compact session traces. The actions of a trace are stored as typed columns in a compressed .npz file:
+
+        kinds       Action type of every action (uint8): OFFER, ACCEPT or OTHER
+        actors      Actor of every action (int16), index into the actor names
+        bids        Value index of every issue of every bid (int16, -1 if the issue is missing), against the value
+                    order of the domain
+        utilities   Utility of every bid for every party (float64, NaN if there is none)
+
+    Position in the columns is the round of the action. Everything else of the trace, the names that the indices refer
+    to and actions of other types are stored as JSON. read_compact_trace returns the same dictionary that was
+    written, so it can be passed to plot_trace.
+"""
+
+OFFER, ACCEPT, OTHER = 0, 1, 2
+ACTION_KINDS = {"Offer": OFFER, "Accept": ACCEPT}
+
+
+def get_domain_values(results_trace: dict) -> dict:
+    # issue -> values in the order of the domain, read from the profile of the first party that has a local profile
+    for party_profile in results_trace.get("partyprofiles", {}).values():
+        profile_path = str(party_profile["profile"]).split(":")[-1]
+        if os.path.exists(profile_path):
+            with open(profile_path, "r", encoding="utf-8") as f:
+                domain = json.load(f)["LinearAdditiveUtilitySpace"]["domain"]
+            return {issue: list(values["values"]) for issue, values in domain["issuesValues"].items()}
+
+    return {}
+
+
+def write_compact_trace(results_trace: dict, trace_file: str):
+    actions = results_trace["actions"]
+
+    issues_values = get_domain_values(results_trace)
+    parties = list(results_trace.get("partyprofiles", {}).keys())
+    actors = []
+    other_actions = {}
+
+    # values that are not in the domain, or traces without a readable domain, get indices in order of appearance
+    for action in actions:
+        for kind, content in action.items():
+            if kind in ACTION_KINDS:
+                for issue, value in content["bid"]["issuevalues"].items():
+                    values = issues_values.setdefault(issue, [])
+                    if value not in values:
+                        values.append(value)
+                for party in content.get("utilities", {}):
+                    if party not in parties:
+                        parties.append(party)
+
+    issues = list(issues_values.keys())
+    value_indices = {issue: {value: i for i, value in enumerate(values)} for issue, values in issues_values.items()}
+
+    kinds = np.full(len(actions), OTHER, dtype=np.uint8)
+    actor_indices = np.full(len(actions), -1, dtype=np.int16)
+    bids = np.full((len(actions), len(issues)), -1, dtype=np.int16)
+    utilities = np.full((len(actions), len(parties)), np.nan, dtype=np.float64)
+
+    for position, action in enumerate(actions):
+        kind, content = next(iter(action.items()))
+        if kind not in ACTION_KINDS or len(action) != 1:
+            other_actions[position] = action
+            continue
+
+        kinds[position] = ACTION_KINDS[kind]
+        if content["actor"] not in actors:
+            actors.append(content["actor"])
+        actor_indices[position] = actors.index(content["actor"])
+
+        issuevalues = content["bid"]["issuevalues"]
+        for k, issue in enumerate(issues):
+            if issue in issuevalues:
+                bids[position, k] = value_indices[issue][issuevalues[issue]]
+        for party, utility in content.get("utilities", {}).items():
+            utilities[position, parties.index(party)] = utility
+
+    meta = {
+        "trace": {key: value for key, value in results_trace.items() if key != "actions"},
+        "issues_values": issues_values,
+        "actors": actors,
+        "parties": parties,
+        "other_actions": {str(position): action for position, action in other_actions.items()},
+    }
+
+    np.savez_compressed(
+        trace_file,
+        kinds=kinds,
+        actors=actor_indices,
+        bids=bids,
+        utilities=utilities,
+        meta=np.array(json.dumps(meta)),
+    )
+
+
+def read_compact_trace(trace_file: str) -> dict:
+    with np.load(trace_file, allow_pickle=False) as data:
+        kinds = data["kinds"]
+        actor_indices = data["actors"]
+        bids = data["bids"]
+        utilities = data["utilities"]
+        meta = json.loads(str(data["meta"]))
+
+    issues_values = meta["issues_values"]
+    issues = list(issues_values.keys())
+    actors = meta["actors"]
+    parties = meta["parties"]
+    kind_names = {kind: name for name, kind in ACTION_KINDS.items()}
+
+    actions = []
+    for position, kind in enumerate(kinds.tolist()):
+        if kind == OTHER:
+            actions.append(meta["other_actions"][str(position)])
+            continue
+
+        content = {
+            "actor": actors[actor_indices[position]],
+            "bid": {
+                "issuevalues": {
+                    issue: issues_values[issue][value_index]
+                    for issue, value_index in zip(issues, bids[position].tolist())
+                    if value_index >= 0
+                }
+            },
+        }
+        party_utilities = {
+            party: utility
+            for party, utility in zip(parties, utilities[position].tolist())
+            if not np.isnan(utility)
+        }
+        if len(party_utilities) > 0:
+            content["utilities"] = party_utilities
+
+        actions.append({kind_names[kind]: content})
+
+    results_trace = {"actions": actions}
+    results_trace.update(meta["trace"])
+
+    return results_trace
@@ -1,22 +1,44 @@
+import argparse
 import json
-from math import sqrt
+from concurrent.futures import ProcessPoolExecutor
+from math import prod, sqrt
 import os
-from itertools import product
-from random import randint
+from itertools import islice, product
 from shutil import rmtree
 from string import ascii_uppercase
 
 import numpy as np
 import plotly.graph_objects as go
-from numpy.random import dirichlet
 
 
 def main():
-    for i in range(50):
-        domain = Domain.create_random(f"domain{i:02d}")
-        domain.calculate_specials()
-        domain.generate_visualisation()
-        domain.to_file("domains/")
+    parser = argparse.ArgumentParser(description="Generate random negotiation domains")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, every domain derives its own seed from it")
+    parser.add_argument("--count", type=int, default=50, help="number of domains")
+    parser.add_argument("--start", type=int, default=0, help="index of the first domain")
+    parser.add_argument("--workers", type=int, default=1, help="number of domains generated in parallel")
+    parser.add_argument("--output", default="domains/", help="parent directory of the domains")
+    args = parser.parse_args()
+
+    indices = range(args.start, args.start + args.count)
+    jobs = [(args.seed, index, args.output) for index in indices]
+
+    # a domain only depends on the base seed and its index, so the output is the same for any number of workers
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(generate_domain, *zip(*jobs)))
+    else:
+        for job in jobs:
+            generate_domain(*job)
+
+
+def generate_domain(seed, index, parent_path):
+    rng = np.random.default_rng([seed, index])
+
+    domain = Domain.create_random(f"domain{index:02d}", rng)
+    domain.calculate_specials()
+    domain.generate_visualisation()
+    domain.to_file(parent_path)
 
 
 class Profile:
@@ -45,9 +67,11 @@ class Profile:
         return cls(profile, issue_weights, value_weights)
 
     @classmethod
-    def create_random(cls, domain, name):
+    def create_random(cls, domain, name, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+
         def dirichlet_dist(names, mode, alpha=1):
-            distribution = (dirichlet([alpha] * len(names)) * 100000).astype(int)
+            distribution = (rng.dirichlet([alpha] * len(names)) * 100000).astype(int)
             if mode == "issues":
                 distribution[0] += 100000 - np.sum(distribution)
             if mode == "values":
@@ -98,6 +122,28 @@ class Profile:
             self.issue_weights[i] * self.value_weights[i][v] for i, v in bid.items()
         )
 
+    def compile(self, issues_values):
+        # weighted utility of every value, one vector per issue in the issue and value order of issues_values
+        return [
+            np.array(
+                [self.issue_weights[i] * self.value_weights[i][v] for v in values["values"]],
+                dtype=np.float64,
+            )
+            for i, values in issues_values.items()
+        ]
+
+    def get_all_utilities(self, issues_values):
+        # utility of every bid in the order of Domain.__iter__, by broadcast-summing the compiled vectors. They are
+        # added in the same order as get_utility adds them, so both give exactly the same utilities.
+        vectors = self.compile(issues_values)
+        shape = [len(vector) for vector in vectors]
+
+        utilities = np.zeros(shape, dtype=np.float64)
+        for k, vector in enumerate(vectors):
+            utilities += vector.reshape([-1 if j == k else 1 for j in range(len(shape))])
+
+        return utilities.ravel()
+
 
 class Domain:
     def __init__(
@@ -121,18 +167,19 @@ class Domain:
         self.visualisation = visualisation
 
     @classmethod
-    def create_random(cls, name):
+    def create_random(cls, name, rng=None):
         # def random_values(num_values):
         #     values = [f"value_{x}" for x in ascii_uppercase[:num_values]]
         #     return {"values": values}
+        rng = rng if rng is not None else np.random.default_rng()
 
-        domain_size = randint(200, 10000)
+        domain_size = int(rng.integers(200, 10000, endpoint=True))
         print(name)
         # print(domain_size)
         while True:
-            num_issues = randint(4, 10)
-            spread = dirichlet([1] * num_issues)
-            multiplier = (domain_size / np.prod(spread)) ** (1.0 / randint(3, 7))
+            num_issues = int(rng.integers(4, 10, endpoint=True))
+            spread = rng.dirichlet([1] * num_issues)
+            multiplier = (domain_size / np.prod(spread)) ** (1.0 / rng.integers(3, 7, endpoint=True))
             values_per_issue = np.round(multiplier * spread).astype(np.int32)
             values_per_issue = np.clip(values_per_issue, 2, None)
             if abs(domain_size - np.prod(values_per_issue)) < (0.1 * domain_size):
@@ -146,8 +193,8 @@ class Domain:
             issuesValues[f"issue{issue}"] = values
 
         domain = {"name": name, "issuesValues": issuesValues}
-        profile_A = Profile.create_random(domain, "profileA")
-        profile_B = Profile.create_random(domain, "profileB")
+        profile_A = Profile.create_random(domain, "profileA", rng)
+        profile_B = Profile.create_random(domain, "profileB", rng)
         return cls(domain, profile_A, profile_B)
 
     @classmethod
@@ -176,30 +223,28 @@ class Domain:
     def calculate_specials(self):
         if self.nash_bid:
             return False
-        self.pareto_front = self.get_pareto(list(self.iter_bids()))
 
-        nash_utility = 0
-        kalai_diff = 10
+        utilities = self.get_all_utilities()
+        front = self._skyline(utilities)
+        self.pareto_front = [self._pareto_entry(self.get_bid(i)) for i in front]
 
-        for pareto_bid in self.pareto_front:
-            utility_A, utility_B = pareto_bid["utility"][0], pareto_bid["utility"][1]
+        # Kalai-Smorodinsky: the first frontier bid with the smallest utility difference
+        front_utilities = utilities[front]
+        kalai = int(np.argmin(np.abs(front_utilities[:, 0] - front_utilities[:, 1])))
+        self.kalai_bid = self.pareto_front[kalai]
+        utility_A, utility_B = self.kalai_bid["utility"]
+        self.opposition = sqrt((utility_A - 1.0) ** 2 + (utility_B - 1.0) ** 2)
 
-            utility_diff = abs(utility_A - utility_B)
-            utility_prod = utility_A * utility_B
-
-            if utility_diff < kalai_diff:
-                self.kalai_bid = pareto_bid
-                kalai_diff = utility_diff
-                self.opposition = sqrt((utility_A - 1.0) ** 2 + (utility_B - 1.0) ** 2)
-            if utility_prod > nash_utility:
-                self.nash_bid = pareto_bid
-                nash_utility = utility_prod
+        # Nash: the first frontier bid with the largest positive utility product
+        products = front_utilities[:, 0] * front_utilities[:, 1]
+        nash = int(np.argmax(products))
+        if products[nash] > 0:
+            self.nash_bid = self.pareto_front[nash]
 
         return True
 
     def generate_visualisation(self):
-        bid_utils = [self.get_utilities(bid) for bid in self.iter_bids()]
-        bid_utils = list(zip(*bid_utils))
+        bid_utils = self.get_all_utilities().T
 
         fig = go.Figure()
 
@@ -256,7 +301,7 @@ class Domain:
 
         fig.update_layout(
             title=dict(
-                text=f"{self.get_name()}<br><sub>(size: {len(list(self.iter_bids()))}, opposition: {self.opposition:.4f})</sub>",
+                text=f"{self.get_name()}<br><sub>(size: {self.size()}, opposition: {self.opposition:.4f})</sub>",
                 x=0.5,
                 xanchor="center",
             )
@@ -280,7 +325,7 @@ class Domain:
                 f.write(
                     json.dumps(
                         {
-                            "size": len(list(self.iter_bids())),
+                            "size": self.size(),
                             "opposition": self.opposition,
                             "nash": self.nash_bid,
                             "kalai": self.kalai_bid,
@@ -301,54 +346,84 @@ class Domain:
     def get_utilities(self, bid):
         return self.profile_A.get_utility(bid), self.profile_B.get_utility(bid)
 
-    def get_pareto(self, all_bids: list):
-        pareto_front = []
-        # dominated_bids = set()
-        while True:
-            candidate_bid = all_bids.pop(0)
-            bid_nr = 0
-            dominated = False
-            while len(all_bids) != 0 and bid_nr < len(all_bids):
-                bid = all_bids[bid_nr]
-                if self._dominates(candidate_bid, bid):
-                    # If it is dominated remove the bid from all bids
-                    all_bids.pop(bid_nr)
-                    # dominated_bids.add(frozenset(bid.items()))
-                elif self._dominates(bid, candidate_bid):
-                    dominated = True
-                    # dominated_bids.add(frozenset(candidate_bid.items()))
-                    bid_nr += 1
-                else:
-                    bid_nr += 1
-
-            if not dominated:
-                # add the non-dominated bid to the Pareto frontier
-                pareto_front.append(
-                    {
-                        "bid": candidate_bid,
-                        "utility": [
-                            self.profile_A.get_utility(candidate_bid),
-                            self.profile_B.get_utility(candidate_bid),
-                        ],
-                    }
-                )
+    def get_all_utilities(self) -> np.ndarray:
+        # utilities of both profiles for every bid in the order of __iter__, as an array of shape (size, 2)
+        issues_values = self.domain["issuesValues"]
+        return np.stack(
+            [
+                self.profile_A.get_all_utilities(issues_values),
+                self.profile_B.get_all_utilities(issues_values),
+            ],
+            axis=1,
+        )
+
+    def get_bid(self, index):
+        # bid at the given position of __iter__
+        issues_values = self.domain["issuesValues"]
+        shape = [len(values["values"]) for values in issues_values.values()]
+        value_indices = np.unravel_index(index, shape)
+
+        return {
+            i: values["values"][value_index]
+            for (i, values), value_index in zip(issues_values.items(), value_indices)
+        }
 
-            if len(all_bids) == 0:
+    def size(self):
+        return prod(len(values["values"]) for values in self.domain["issuesValues"].values())
+
+    def get_pareto(self, all_bids, chunk_size: int = 100000):
+        # 2-D skyline: a bid is on the Pareto frontier if no other bid has at least its utility for both profiles.
+        # all_bids can be any iterable of bids. It is consumed in chunks and only the frontier found so far is kept
+        # between chunks, so the bids do not have to fit in memory.
+        bids_iter = iter(all_bids)
+        front_bids = []
+        front_utilities = np.empty((0, 2), dtype=np.float64)
+
+        while True:
+            chunk = list(islice(bids_iter, chunk_size))
+            if len(chunk) == 0:
                 break
 
-        pareto_front = sorted(pareto_front, key=lambda d: d["utility"][0])
+            # the frontier so far goes first: its bids came earlier, so they win ties with bids of this chunk
+            bids = front_bids + chunk
+            utilities = np.concatenate([front_utilities, self.get_utilities_array(chunk)])
+
+            front = self._skyline(utilities)
+            front_bids = [bids[i] for i in front]
+            front_utilities = utilities[front]
+
+        pareto_front = [self._pareto_entry(bid) for bid in front_bids]
 
         return pareto_front
 
-    def _dominates(self, bid, candidate_bid):
-        if self.profile_A.get_utility(bid) < self.profile_A.get_utility(candidate_bid):
-            return False
-        elif self.profile_B.get_utility(bid) < self.profile_B.get_utility(
-            candidate_bid
-        ):
-            return False
-        else:
-            return True
+    def _pareto_entry(self, bid):
+        return {
+            "bid": bid,
+            "utility": [
+                self.profile_A.get_utility(bid),
+                self.profile_B.get_utility(bid),
+            ],
+        }
+
+    @staticmethod
+    def _skyline(utilities: np.ndarray) -> np.ndarray:
+        # sweep from the highest utility A down, a bid is on the frontier if its utility B beats every bid before it.
+        # Ties are broken by position, so of bids with equal utilities only the first one is kept.
+        positions = np.arange(len(utilities))
+        order = np.lexsort((positions, -utilities[:, 1], -utilities[:, 0]))
+
+        utilities_B = utilities[order, 1]
+        best_B = np.maximum.accumulate(utilities_B)
+        on_front = np.ones(len(order), dtype=bool)
+        on_front[1:] = utilities_B[1:] > best_B[:-1]
+
+        # frontier in ascending order of utility A
+        return order[on_front][::-1]
+
+    def get_utilities_array(self, bids: list) -> np.ndarray:
+        return np.array(
+            [self.get_utilities(bid) for bid in bids], dtype=np.float64
+        ).reshape(-1, 2)
 
     def get_name(self):
         return self.domain["name"]
@@ -0,0 +1,95 @@
+import importlib
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+import numpy as np
+from geniusweb.inform.ActionDone import ActionDone
+from geniusweb.inform.Settings import Settings
+from geniusweb.inform.YourTurn import YourTurn
+
+# informs whose handling is timed, and the name they get in the session summary
+INFORM_KINDS = {YourTurn: "your_turn", ActionDone: "action_done", Settings: "settings"}
+LATENCY_STATS = ["count", "mean", "p50", "p95", "p99", "max"]
+
+
+class LatencyRecorder:
+    """Records how long every party takes to handle a notifyChange call, per type of inform.
+
+    The agent classes are instrumented while a session runs. Parties are told apart by the
+    position in their party id, which is the same position the session summary uses.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: defaultdict(list))
+        self.positions = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def instrument(self, agent_classes: list):
+        classes = []
+        for agent_class in dict.fromkeys(agent_classes):
+            module_name, class_name = agent_class.rsplit(".", 1)
+            classes.append(getattr(importlib.import_module(module_name), class_name))
+
+        # remember what the classes themselves define, inherited methods are shadowed instead of replaced. All methods
+        # are looked up before any is replaced, so an agent that extends another agent is not timed twice.
+        originals = [(cls, cls.__dict__.get("notifyChange")) for cls in classes]
+        timed = [(cls, self.timed(cls.notifyChange)) for cls in classes]
+        for cls, notify_change in timed:
+            cls.notifyChange = notify_change
+
+        try:
+            yield self
+        finally:
+            for cls, original in originals:
+                if original is None:
+                    del cls.notifyChange
+                else:
+                    cls.notifyChange = original
+
+    def timed(self, notify_change):
+        recorder = self
+
+        def notifyChange(party, data):
+            start = perf_counter()
+            try:
+                return notify_change(party, data)
+            finally:
+                recorder.record(party, data, perf_counter() - start)
+
+        return notifyChange
+
+    def record(self, party, data, elapsed: float):
+        kind = INFORM_KINDS.get(type(data))
+        if kind is None:
+            return
+
+        with self.lock:
+            if isinstance(data, Settings):
+                self.positions[id(party)] = str(data.getID()).split("_")[-1]
+
+            position = self.positions.get(id(party))
+            if position is not None:
+                self.samples[position][kind].append(elapsed * 1000.0)
+
+    def get_summary(self) -> dict:
+        # latency_<kind>_<stat>_<position> in ms, for every party and timed inform
+        summary = {}
+        for position in sorted(self.samples):
+            for kind in INFORM_KINDS.values():
+                latencies = np.array(self.samples[position][kind], dtype=np.float64)
+                stats = dict.fromkeys(LATENCY_STATS, 0.0)
+                stats["count"] = len(latencies)
+
+                if len(latencies) > 0:
+                    stats["mean"] = float(latencies.mean())
+                    stats["max"] = float(latencies.max())
+                    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                    stats["p50"], stats["p95"], stats["p99"] = float(p50), float(p95), float(p99)
+
+                for stat, value in stats.items():
+                    summary[f"latency_{kind}_{stat}_{position}"] = value
+
+        return summary
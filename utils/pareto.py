@@ -0,0 +1,83 @@
+import json
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from math import hypot
+from typing import NamedTuple, Optional
+
+# profile file names of the domains, in the order of the utilities in specials.json
+PROFILE_FILES = ["profileA.json", "profileB.json"]
+
+
+class Specials(NamedTuple):
+    front_A: list   # utility A of the Pareto frontier, ascending
+    front_B: list   # utility B of the Pareto frontier, in the same order
+    nash: tuple     # utilities of the Nash bid
+    kalai: tuple    # utilities of the Kalai-Smorodinsky bid
+
+
+@lru_cache(maxsize=None)
+def load_specials(domain_dir: str) -> Optional[Specials]:
+    # loaded once per domain and process, None if the domain has no specials.json
+    specials_path = os.path.join(domain_dir, "specials.json")
+    if not os.path.exists(specials_path):
+        return None
+
+    with open(specials_path, "r", encoding="utf-8") as f:
+        specials = json.load(f)
+
+    front = sorted(tuple(bid["utility"]) for bid in specials["pareto_front"])
+
+    return Specials(
+        [utility_A for utility_A, _ in front],
+        [utility_B for _, utility_B in front],
+        tuple(specials["nash"]["utility"]),
+        tuple(specials["kalai"]["utility"]),
+    )
+
+
+def distance_to_pareto(specials: Specials, utility_A: float, utility_B: float) -> float:
+    # distance to the nearest point of the frontier. The search starts at the frontier points with the closest
+    # utility A and walks outwards until the difference in utility A alone exceeds the best distance.
+    position = bisect_left(specials.front_A, utility_A)
+    best = float("inf")
+
+    for step in (-1, 1):
+        i = position if step == 1 else position - 1
+        while 0 <= i < len(specials.front_A):
+            if abs(specials.front_A[i] - utility_A) >= best:
+                break
+            best = min(best, hypot(specials.front_A[i] - utility_A, specials.front_B[i] - utility_B))
+            i += step
+
+    return best
+
+
+def get_outcome_distances(profile_uris: dict, utilities: dict) -> dict:
+    """Distances of a session outcome to the Pareto frontier, the Nash bid and the Kalai-Smorodinsky bid.
+
+    "profile_uris" maps every party to its profile URI, "utilities" maps every party to its utility of the
+    outcome. Nothing is returned if the profiles are not profileA and profileB of a domain with a specials.json.
+    """
+    point = [None, None]
+    domain_dirs = set()
+    for party, profile_uri in profile_uris.items():
+        profile_path = profile_uri.split(":")[-1]
+        if os.path.basename(profile_path) not in PROFILE_FILES:
+            return {}
+        point[PROFILE_FILES.index(os.path.basename(profile_path))] = utilities[party]
+        domain_dirs.add(os.path.dirname(profile_path))
+
+    if len(domain_dirs) != 1 or None in point:
+        return {}
+
+    specials = load_specials(domain_dirs.pop())
+    if specials is None:
+        return {}
+
+    utility_A, utility_B = point
+    return {
+        "pareto_distance": distance_to_pareto(specials, utility_A, utility_B),
+        "nash_distance": hypot(specials.nash[0] - utility_A, specials.nash[1] - utility_B),
+        "kalai_distance": hypot(specials.kalai[0] - utility_A, specials.kalai[1] - utility_B),
+    }
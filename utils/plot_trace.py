@@ -1,10 +1,13 @@
 import os
 from collections import defaultdict
 
+import numpy as np
 import plotly.graph_objects as go
 
 
-def plot_trace(results_trace: dict, plot_file: str):
+def plot_trace(results_trace: dict, plot_file: str, max_points: int = None):
+    # with max_points, every line is drawn with WebGL and downsampled to about max_points points, so the size of the
+    # plot does not grow with the length of the negotiation
     utilities = defaultdict(lambda: defaultdict(lambda: {"x": [], "y": [], "bids": []}))
     accept = {"x": [], "y": [], "bids": []}
     for index, action in enumerate(results_trace["actions"], 1):
@@ -23,9 +26,11 @@ def plot_trace(results_trace: dict, plot_file: str):
                 accept["y"].append(util)
                 accept["bids"].append(offer["bid"]["issuevalues"])
 
+    scatter = go.Scatter if max_points is None else go.Scattergl
+
     fig = go.Figure()
     fig.add_trace(
-        go.Scatter(
+        scatter(
             mode="markers",
             x=accept["x"],
             y=accept["y"],
@@ -39,19 +44,21 @@ def plot_trace(results_trace: dict, plot_file: str):
     for i, (agent, data) in enumerate(utilities.items()):
         for actor, utility in data.items():
             name = "_".join(agent.split("_")[-2:])
+            kept = downsample(utility["x"], utility["y"], max_points, accept["x"])
+            # hover text is only built for the points that are drawn
             text = []
-            for bid, util in zip(utility["bids"], utility["y"]):
+            for k in kept:
                 text.append(
                     "<br>".join(
-                        [f"<b>utility: {util:.3f}</b><br>"]
-                        + [f"{i}: {v}" for i, v in bid.items()]
+                        [f"<b>utility: {utility['y'][k]:.3f}</b><br>"]
+                        + [f"{i}: {v}" for i, v in utility["bids"][k].items()]
                     )
                 )
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     mode="lines+markers" if agent == actor else "markers",
-                    x=utilities[agent][actor]["x"],
-                    y=utilities[agent][actor]["y"],
+                    x=[utility["x"][k] for k in kept],
+                    y=[utility["y"][k] for k in kept],
                     name=f"{name} offered" if agent == actor else f"{name} received",
                     legendgroup=agent,
                     marker={"color": color[i]},
@@ -73,3 +80,24 @@ def plot_trace(results_trace: dict, plot_file: str):
     fig.update_xaxes(title_text="round", range=[0, index + 1], ticks="outside")
     fig.update_yaxes(title_text="utility", range=[0, 1], ticks="outside")
     fig.write_html(f"{os.path.splitext(plot_file)[0]}.html")
+
+
+def downsample(x: list, y: list, max_points: int, keep_x: list) -> list:
+    # min-max downsampling: the points are split into buckets and the lowest and highest point of every bucket are
+    # kept, so the shape of the line survives. The first, last and extreme points and the points at keep_x (the
+    # agreement) are always kept.
+    if max_points is None or len(y) <= max_points:
+        return list(range(len(y)))
+
+    y = np.asarray(y, dtype=np.float64)
+    keep_x = set(keep_x)
+    kept = {0, len(y) - 1, int(np.argmin(y)), int(np.argmax(y))}
+    kept.update(k for k, round_ in enumerate(x) if round_ in keep_x)
+
+    num_buckets = max(1, (max_points - len(kept)) // 2)
+    for bucket in np.array_split(np.arange(len(y)), num_buckets):
+        if len(bucket) > 0:
+            kept.add(int(bucket[np.argmin(y[bucket])]))
+            kept.add(int(bucket[np.argmax(y[bucket])]))
+
+    return sorted(kept)
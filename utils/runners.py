@@ -1,6 +1,9 @@
+import json
 import math
+import os
 import shutil
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from itertools import permutations
 from math import factorial, prod
 from pathlib import Path
@@ -21,7 +24,14 @@ from geniusweb.simplerunner.Runner import Runner
 from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
+from agents.bidspace.artifacts import prepare_artifacts
 from utils.ask_proceed import ask_proceed
+from utils.latency import INFORM_KINDS, LATENCY_STATS, LatencyRecorder
+from utils.pareto import get_outcome_distances
+from utils.session_storage import isolate_storage, merge_storage
+
+# Wall clock limit of a simulated-time session, it only stops agents that hang
+SIMULATED_TIMEOUT_MS = 10 * 60 * 1000
 
 
 def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
@@ -35,6 +45,16 @@ def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
     assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
     assert all(["class" in agent for agent in agents])
 
+    if "simulated_action_ms" in settings:
+        assert isinstance(settings["simulated_action_ms"], int) and settings["simulated_action_ms"] > 0
+        # simulated time: every action costs a fixed amount of time, so the session lasts a fixed number of rounds in
+        # which both agents act once. It runs as fast as the agents compute and does not depend on machine load.
+        rounds = max(1, deadline_time_ms // (2 * settings["simulated_action_ms"]))
+        timeout_ms = settings.get("timeout_ms", SIMULATED_TIMEOUT_MS)
+        deadline = {"DeadlineRounds": {"rounds": rounds, "durationms": timeout_ms}}
+    else:
+        deadline = {"DeadlineTime": {"durationms": deadline_time_ms}}
+
     for agent in agents:
         if "parameters" in agent:
             if "storage_dir" in agent["parameters"]:
@@ -47,6 +67,9 @@ def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
     # file path to uri
     profiles_uri = [f"file:{x}" for x in profiles]
 
+    # precompute the bid space artifacts that the agents memory map instead of rebuilding them every session
+    prepare_bid_space_artifacts(profiles)
+
     # create full settings dictionary that geniusweb requires
     settings_full = {
         "SAOPSettings": {
@@ -82,8 +105,7 @@ def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
                     }
                 },
             ],
-            # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
-            "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+            "deadline": deadline,
         }
     }
 
@@ -93,8 +115,10 @@ def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
     # create the negotiation session runner object
     runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
 
-    # run the negotiation session
-    runner.run()
+    # run the negotiation session, timing how long the agents take to handle every inform
+    latency_recorder = LatencyRecorder()
+    with latency_recorder.instrument([agent["class"] for agent in agents]):
+        runner.run()
 
     # get results from the session in class format and dict format
     results_class: SAOPState = runner.getProtocol().getState()
@@ -102,19 +126,29 @@ def run_session(settings, clean_storage: bool = False) -> Tuple[dict, dict]:
 
     # add utilities to the results and create a summary
     results_trace, results_summary = process_results(results_class, results_dict)
+    results_summary.update(latency_recorder.get_summary())
 
     return results_trace, results_summary
 
 
-def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+def run_tournament(
+    tournament_settings: dict,
+    workers: int = 1,
+    checkpoint_path: Path = None,
+    resume: bool = False,
+) -> Tuple[list, list]:
+    if resume and checkpoint_path is None:
+        raise ValueError("resume requires a checkpoint_path to resume from")
+
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
     agents = tournament_settings["agents"]
     profile_sets = tournament_settings["profile_sets"]
     deadline_time_ms = tournament_settings["deadline_time_ms"]
+    repetitions = tournament_settings.get("repetitions", 1)
 
     num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(
         profile_sets
-    )
+    ) * repetitions
     if num_sessions > 100:
         message = (
             f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
@@ -123,31 +157,126 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
             print("Exiting script")
             exit()
 
-    tournament_results = []
     tournament_steps = []
-    for profiles in profile_sets:
-        # quick an dirty check
-        assert isinstance(profiles, list) and len(profiles) == 2
-        for agent_duo in permutations(agents, 2):
-            # create session settings dict
-            settings = {
-                "agents": list(agent_duo),
-                "profiles": profiles,
-                "deadline_time_ms": deadline_time_ms,
-            }
-
-            # run a single negotiation session
-            _, session_results_summary = run_session(settings)
-
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
+    session_keys = []
+    for repetition in range(repetitions):
+        for profiles in profile_sets:
+            # quick an dirty check
+            assert isinstance(profiles, list) and len(profiles) == 2
+            for agent_duo in permutations(agents, 2):
+                # create session settings dict
+                settings = {
+                    "agents": list(agent_duo),
+                    "profiles": profiles,
+                    "deadline_time_ms": deadline_time_ms,
+                }
+                if "simulated_action_ms" in tournament_settings:
+                    settings["simulated_action_ms"] = tournament_settings["simulated_action_ms"]
+                tournament_steps.append(settings)
+                session_keys.append(get_session_key(settings, repetition))
+
+    # sessions that are already in the checkpoint are not run again
+    session_results = {}
+    if checkpoint_path is not None:
+        checkpoint = load_checkpoint(checkpoint_path) if resume else {}
+        session_results = {
+            i: checkpoint[key] for i, key in enumerate(session_keys) if key in checkpoint
+        }
+        if not resume:
+            open(checkpoint_path, "w").close()
+        elif Path(checkpoint_path).exists():
+            # terminate a line that was cut off by an interrupted run, so the next row starts on its own line
+            with open(checkpoint_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+    pending = [i for i in range(len(tournament_steps)) if i not in session_results]
+
+    if workers > 1:
+        # build the bid space artifacts once, instead of racing to build them in every worker
+        for profiles in profile_sets:
+            prepare_bid_space_artifacts(profiles)
+
+        # every session gets its own copy of the agent storage, so sessions running at the same time do not write to
+        # the same files. A copy is made when its session starts and merged back when it is done, so a session
+        # learns from all sessions that finished before it started.
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            queue = iter(pending)
+            futures = {}
+            while True:
+                for i in queue:
+                    settings = isolate_storage(tournament_steps[i], i)
+                    futures[executor.submit(run_session_summary, settings)] = (i, settings)
+                    if len(futures) >= workers:
+                        break
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, settings = futures.pop(future)
+                    session_results[i] = future.result()
+                    merge_storage(settings)
+                    append_checkpoint(checkpoint_path, session_keys[i], session_results[i])
+    else:
+        for i in pending:
+            session_results[i] = run_session_summary(tournament_steps[i])
+            append_checkpoint(checkpoint_path, session_keys[i], session_results[i])
+
+    # results in the order of the sessions, no matter when they finished
+    tournament_results = [session_results[i] for i in range(len(tournament_steps))]
 
     tournament_results_summary = process_tournament_results(tournament_results)
 
     return tournament_steps, tournament_results, tournament_results_summary
 
 
+def get_session_key(settings: dict, repetition: int) -> str:
+    # identifies a session by its agent pair, profile set and repetition
+    return json.dumps(
+        {
+            "agents": settings["agents"],
+            "profiles": settings["profiles"],
+            "repetition": repetition,
+        },
+        sort_keys=True,
+    )
+
+
+def load_checkpoint(checkpoint_path: Path) -> dict:
+    # session key -> session summary of every session in the checkpoint
+    checkpoint = {}
+    if not Path(checkpoint_path).exists():
+        return checkpoint
+
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # last line of an interrupted run
+                continue
+            checkpoint[row["key"]] = row["summary"]
+
+    return checkpoint
+
+
+def append_checkpoint(checkpoint_path: Path, key: str, session_results_summary: dict):
+    # one line per finished session, flushed to disk so an interrupted tournament can be resumed
+    if checkpoint_path is None:
+        return
+
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": key, "summary": session_results_summary}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def run_session_summary(settings: dict) -> dict:
+    # run a single negotiation session, only the summary is sent back from the worker processes
+    _, session_results_summary = run_session(settings)
+
+    return session_results_summary
+
+
 def process_results(results_class: SAOPState, results_dict: dict):
     # dict to translate geniusweb agent reference to Python class name
     agent_translate = {
@@ -200,6 +329,12 @@ def process_results(results_class: SAOPState, results_dict: dict):
         utilities_final = [0, 0]
         result = "ERROR"
 
+    # efficiency of the outcome, only agreements have one. Distances of the disagreement point would measure the
+    # failure rate again, which the result column already counts.
+    if result == "agreement":
+        profile_uris = {k: v["profile"] for k, v in results_dict["partyprofiles"].items()}
+        results_summary.update(get_outcome_distances(profile_uris, offer["utilities"]))
+
     for i, actor in enumerate(results_dict["connections"]):
         position = actor.split("_")[-1]
         results_summary[f"agent_{position}"] = agent_translate[actor]
@@ -211,6 +346,12 @@ def process_results(results_class: SAOPState, results_dict: dict):
     return results_dict, results_summary
 
 
+def prepare_bid_space_artifacts(profiles: list):
+    # artifacts are only rebuilt if they are missing or the profile changed since they were stored
+    for profile_path in profiles:
+        prepare_artifacts(get_utility_function(f"file:{profile_path}"), profile_path)
+
+
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
     profile_connection = ProfileConnectionFactory.create(
         URI(profile_uri), StdOutReporter()
@@ -223,6 +364,7 @@ def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
 
 def process_tournament_results(tournament_results):
     agent_result_raw = defaultdict(lambda: defaultdict(list))
+    agent_latency_raw = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
     tournament_results_summary = defaultdict(lambda: defaultdict(int))
     for session_results in tournament_results:
         agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
@@ -240,24 +382,57 @@ def process_tournament_results(tournament_results):
                 agent_result_raw[agent_class]["num_offers"].append(
                     session_results["num_offers"]
                 )
+            # averaged over the agreements, sessions of older checkpoints may have distances of failed sessions
+            for distance in ["pareto_distance", "nash_distance", "kalai_distance"]:
+                if distance in session_results and session_results["result"] == "agreement":
+                    agent_result_raw[agent_class][distance].append(
+                        session_results[distance]
+                    )
+            for kind in INFORM_KINDS.values():
+                position = agent_id.split("_")[1]
+                # sessions in which the agent never handled this inform do not count
+                if session_results.get(f"latency_{kind}_count_{position}", 0) > 0:
+                    for stat in LATENCY_STATS:
+                        agent_latency_raw[agent_class][kind][stat].append(
+                            session_results[f"latency_{kind}_{stat}_{position}"]
+                        )
             tournament_results_summary[agent_class][session_results["result"]] += 1
 
     for agent, stats in agent_result_raw.items():
         num_session = len(stats["utility"])
         for desc, stat in stats.items():
-            stat_average = sum(stat) / num_session
+            # averaged over the sessions that report the statistic
+            stat_average = sum(stat) / len(stat)
             tournament_results_summary[agent][f"avg_{desc}"] = stat_average
         tournament_results_summary[agent]["count"] = num_session
 
+    # latency in ms: the mean is weighted by the number of informs, percentiles are averaged over the sessions
+    for agent, kinds in agent_latency_raw.items():
+        for kind, stats in kinds.items():
+            count = sum(stats["count"])
+            mean = sum(c * m for c, m in zip(stats["count"], stats["mean"])) / count
+            tournament_results_summary[agent][f"latency_{kind}_mean"] = mean
+            for stat in ["p50", "p95", "p99"]:
+                stat_average = sum(stats[stat]) / len(stats[stat])
+                tournament_results_summary[agent][f"latency_{kind}_{stat}"] = stat_average
+            tournament_results_summary[agent][f"latency_{kind}_max"] = max(stats["max"])
+
     column_order = [
         "avg_utility",
         "avg_nash_product",
         "avg_social_welfare",
         "avg_num_offers",
+        "avg_pareto_distance",
+        "avg_nash_distance",
+        "avg_kalai_distance",
         "count",
         "agreement",
         "failed",
         "ERROR",
+    ] + [
+        f"latency_{kind}_{stat}"
+        for kind in INFORM_KINDS.values()
+        for stat in ["mean", "p50", "p95", "p99", "max"]
     ]
     column_type = {
         "count": int,
@@ -269,11 +444,14 @@ def process_tournament_results(tournament_results):
     # results dictionary to dataframe
     tournament_results_summary = pd.DataFrame(tournament_results_summary).T
 
-    # clean data and types
-    tournament_results_summary = tournament_results_summary.fillna(0)
+    # clean data and types. Distances are averages over the agreements, which the agreement column counts, so they
+    # stay empty for agents without any agreement.
+    tournament_results_summary = tournament_results_summary.fillna(
+        {column: 0 for column in tournament_results_summary.columns if not column.endswith("_distance")}
+    )
     for column in column_order:
         if column not in tournament_results_summary:
-            tournament_results_summary[column] = 0
+            tournament_results_summary[column] = float("nan") if column.endswith("_distance") else 0
     tournament_results_summary = tournament_results_summary.astype(column_type)
 
     # structure dataframe
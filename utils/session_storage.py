@@ -0,0 +1,98 @@
+import copy
+import json
+import os
+import shutil
+from pathlib import Path
+
+from agents.storage.files import replace_file
+from agents.storage.learning_store import COMPACTED_FILE, LOCK_FILE
+
+# Sessions that run at the same time each get a copy of the storage directory of their agents:
+#
+#     {storage_dir}/sessions/<session index>/
+#
+# The copy lists the files it started with in a snapshot. When the session is done, the files it created or changed
+# are merged back into the storage directory and the copy is removed, so later sessions learn from it.
+
+SESSIONS_DIR = "sessions"
+SNAPSHOT_FILE = ".snapshot.json"
+IGNORED = (SESSIONS_DIR, SNAPSHOT_FILE, LOCK_FILE, "*.tmp")
+
+
+def isolate_storage(settings: dict, session_index: int) -> dict:
+    # copy the settings with the storage directory of every agent replaced by a per-session copy of it
+    settings = copy.deepcopy(settings)
+
+    for agent in settings["agents"]:
+        if "storage_dir" not in agent.get("parameters", {}):
+            continue
+
+        storage_dir = Path(agent["parameters"]["storage_dir"])
+        session_dir = storage_dir.joinpath(SESSIONS_DIR, f"{session_index:05d}")
+        if session_dir.exists():
+            shutil.rmtree(session_dir)
+
+        if storage_dir.exists():
+            shutil.copytree(storage_dir, session_dir, ignore=shutil.ignore_patterns(*IGNORED))
+        else:
+            session_dir.mkdir(parents=True)
+
+        with open(session_dir.joinpath(SNAPSHOT_FILE), "w", encoding="utf-8") as f:
+            json.dump(list_files(session_dir), f)
+
+        agent["parameters"]["storage_dir"] = str(session_dir)
+
+    return settings
+
+
+def merge_storage(settings: dict):
+    # merge what the sessions of isolated settings wrote back into the storage directories, then remove the copies
+    session_dirs = {
+        Path(agent["parameters"]["storage_dir"])
+        for agent in settings["agents"]
+        if "storage_dir" in agent.get("parameters", {})
+    }
+
+    for session_dir in session_dirs:
+        storage_dir = session_dir.parent.parent
+        with open(session_dir.joinpath(SNAPSHOT_FILE), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+
+        for name, state in list_files(session_dir).items():
+            # shards have unique names, so new ones are added next to those of other sessions. A compacted file only
+            # holds records that the storage directory already has, as a session loads its data before it saves.
+            if snapshot.get(name) == state or Path(name).name == COMPACTED_FILE:
+                continue
+
+            copy_file(session_dir.joinpath(name), storage_dir.joinpath(name))
+
+        shutil.rmtree(session_dir)
+
+        # the sessions directory is left when other sessions still run
+        try:
+            session_dir.parent.rmdir()
+        except OSError:
+            pass
+
+
+def list_files(directory: Path) -> dict:
+    # relative path -> [modification time, size] of the files of a directory, without those that are not merged
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [name for name in dirs if name != SESSIONS_DIR]
+        for name in names:
+            if name in (SNAPSHOT_FILE, LOCK_FILE) or name.endswith(".tmp"):
+                continue
+            path = Path(root, name)
+            stat = path.stat()
+            files[path.relative_to(directory).as_posix()] = [stat.st_mtime_ns, stat.st_size]
+
+    return files
+
+
+def copy_file(source: Path, destination: Path):
+    # copy a file so that readers of the destination see either the old or the new content
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(source, "rb") as f:
+        replace_file(destination, lambda out: shutil.copyfileobj(f, out))